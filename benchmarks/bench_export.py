@@ -0,0 +1,43 @@
+"""Scaling benchmark for export_parallel.
+
+    python benchmarks/bench_export.py --clients 2000 --workers 1 2 4 8
+
+Checks that every worker count reproduces the serial output, and reports
+clients/s and speedup per worker count. Pass --no-png to time planning and
+text export only.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_batch import make_roster  # noqa: E402
+from workout_planner_export import ImageOptions, export_parallel  # noqa: E402
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--no-png", action="store_true")
+    parser.add_argument("--image-format", default="png", help="png, webp or svg")
+    args = parser.parse_args()
+
+    roster = make_roster(args.clients)
+    reference = None
+    base_rate = None
+    for workers in args.workers:
+        t0 = time.perf_counter()
+        image = None if args.no_png else ImageOptions(args.image_format)
+        digest = [(item.text, item.images) for item in export_parallel(
+            roster, seed=1, workers=workers, chunk_size=args.chunk_size, image=image)]
+        rate = len(digest) / (time.perf_counter() - t0)
+        if reference is None:
+            reference, base_rate = digest, rate
+        match = "match" if digest == reference else "MISMATCH"
+        print(f"workers={workers:<3} {rate:10.0f} clients/s  speedup {rate / base_rate:5.2f}x  output {match}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Throughput benchmark for periodized programs over a large roster.
+
+    python benchmarks/bench_program.py --clients 5000 --weeks 12
+
+Compares three ways to get multi-week programs:
+  stitched   plan_week called once per client per week (the old approach)
+  program    plan_programs_batch with every week materialized
+  first-week plan_programs_batch reading only week 1 (what a UI shows first)
+and reports programs/s, weeks/s and the time to the first week of one
+16-week program.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_batch import make_roster  # noqa: E402
+from workout_planner_core import derive_seed, plan_week, tags_from_injury_text  # noqa: E402
+from workout_planner_program import Program, ProgramSpec, plan_programs_batch  # noqa: E402
+
+def stitched(roster, weeks: int):
+    out = []
+    for i, profile in enumerate(roster):
+        avoid = tags_from_injury_text(profile.injury_text)
+        out.append([plan_week(None, profile.days, profile.targets_by_day, profile.difficulty, profile.duration, avoid,
+                              seed=derive_seed(derive_seed(1, i), w)) for w in range(weeks)])
+    return out
+
+def materialized(roster, weeks: int):
+    return [list(program) for program in plan_programs_batch(roster, weeks=weeks, seed=1)]
+
+def first_week(roster, weeks: int):
+    return [program[0] for program in plan_programs_batch(roster, weeks=weeks, seed=1)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--weeks", type=int, default=12)
+    args = parser.parse_args()
+
+    roster = make_roster(args.clients)
+    for name, fn in [("stitched", stitched), ("program", materialized), ("first-week", first_week)]:
+        t0 = time.perf_counter()
+        fn(roster, args.weeks)
+        elapsed = time.perf_counter() - t0
+        weeks_built = args.clients * (1 if name == "first-week" else args.weeks)
+        print(f"{name:<11}{args.clients / elapsed:10.0f} programs/s {weeks_built / elapsed:10.0f} weeks/s "
+              f"({elapsed:.2f}s)")
+
+    spec = ProgramSpec.from_args(["Monday", "Tuesday", "Thursday", "Friday", "Saturday"],
+                                 {}, "Advanced", 120, [], weeks=16, seed=5)
+    t0 = time.perf_counter()
+    Program(spec)[0]
+    print(f"first week of a 16-week program: {(time.perf_counter() - t0) * 1e3:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Multi-session load test for the Streamlit app, driven headlessly by AppTest.
+
+    python benchmarks/load_app.py --sessions 1 8 32 --iterations 2
+
+Each simulated session runs a scripted flow: load the page, change sidebar
+settings, type injuries, pick days, generate a week, open several days,
+download the day's image and regenerate after retargeting one day.
+
+AppTest is not thread-safe, so every session runs in its own process and
+all of them start together behind a barrier. That makes this a different
+setup from production in two ways:
+
+- A real Streamlit server runs every session on threads in one process, so
+  concurrent reruns there compete for the GIL. Here they run on separate
+  cores and never do. Latencies at 8 or 32 sessions therefore UNDERSTATE
+  what one server process would show. For sizing, treat the per-interaction
+  CPU figures as the real cost and budget about one core's worth of
+  concurrent reruns per server process.
+- Each process has its own module-level caches (plan cache, image cache,
+  catalog), so hit rates are lower than with shared caches. Only the plan
+  store is shared: a throwaway SQLite file, never FORGE_PLAN_DB.
+
+For every step it reports wall-clock rerun latency (p50/p95/p99/max) and CPU
+per interaction. CPU comes from the app's own RerunMetrics records, full
+and fragment reruns alike, labelled per session through ``?loadtest=<id>``.
+It also reports each session process's RSS growth and pickled session_state
+size. Streamlit's AppTest cannot click download buttons, so the download
+step calls the render cache with the same text, title, format and speed as
+the button's callback.
+"""
+import argparse
+import os
+import shutil
+import pickle
+import random
+import resource
+import statistics
+import sys
+import multiprocessing
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+APP = os.path.join(os.path.dirname(__file__), "..", "workout_planner_streamlit.py")
+INJURIES = ["", "", "knee pain", "lower back tightness", "sore shoulder, wrist", "achilles"]
+DIFFICULTIES = ["Beginner", "Intermediate", "Advanced"]
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+STATE_KEYS = ["week_plan", "plan_inputs", "rebuilt_days", "_memo"]
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is KiB on Linux, bytes on macOS; only a peak, but better than nothing
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def by_label(widgets, prefix: str):
+    for widget in widgets:
+        if widget.label.startswith(prefix):
+            return widget
+    raise LookupError(f"No widget labelled {prefix!r}")
+
+class Session:
+    """One simulated user: an AppTest instance plus the samples its steps produce."""
+
+    def __init__(self, sid: str, seed: int, timeout: float):
+        from streamlit.testing.v1 import AppTest
+        self.sid = sid
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(APP, default_timeout=timeout)
+        self.at.query_params["loadtest"] = sid
+        self.latency = defaultdict(list)  # step -> [ms]
+        self.cpu = defaultdict(list)      # step -> [ms]
+        self.errors = 0
+        self._seen = set()
+
+    def _app_cpu_ms(self, history) -> float:
+        # Records this session produced since the last step. A full rerun's CPU already includes the
+        # fragments it ran, so fragment records only count when no full rerun happened (fragment-only rerun).
+        app = fragments = 0.0
+        for record in list(history):
+            if record.get("session") != self.sid or record["rerun_id"] in self._seen:
+                continue
+            self._seen.add(record["rerun_id"])
+            if record["scope"] == "app":
+                app += record["cpu_ms"]
+            else:
+                fragments += record["cpu_ms"]
+        return app or fragments
+
+    def step(self, name: str, action=None):
+        from workout_planner_metrics import HISTORY
+        if action is not None:
+            action(self.at)
+        t0 = time.perf_counter()
+        self.at.run()
+        self.latency[name].append((time.perf_counter() - t0) * 1000)
+        self.cpu[name].append(self._app_cpu_ms(HISTORY))
+        self.errors += len(self.at.exception)
+
+    def download(self, day: str):
+        # What the download button's callback does on click: a cache lookup or one render,
+        # keyed exactly as image_download_data() keys it in week_view
+        from workout_planner_core import get_png_cache
+        text = by_label(self.at.text_area, "Copy text plan").value
+        state = self.at.session_state
+        fmt = state["image_format"] if "image_format" in state else "png"
+        speed = state["image_speed"] if "image_speed" in state else "balanced"
+        t0, c0 = time.perf_counter(), time.thread_time()
+        get_png_cache().get_or_render(text, title=f"{day} Workout", fmt=fmt, speed=speed)
+        self.latency["download"].append((time.perf_counter() - t0) * 1000)
+        self.cpu["download"].append((time.thread_time() - c0) * 1000)
+
+    def run_flow(self, iterations: int, image_format: str):
+        rng = self.rng
+        self.step("load")
+        self.step("athlete", lambda at: by_label(at.sidebar.text_input, "Athlete").input(self.sid))
+        if image_format:
+            self.step("format", lambda at: by_label(at.sidebar.selectbox, "Image format").set_value(image_format))
+        for _ in range(iterations):
+            days = sorted(rng.sample(WEEK_DAYS, rng.randint(3, 5)), key=WEEK_DAYS.index)
+            self.step("difficulty", lambda at: by_label(at.sidebar.select_slider, "Difficulty").set_value(rng.choice(DIFFICULTIES)))
+            self.step("duration", lambda at: by_label(at.sidebar.slider, "Daily target duration").set_value(rng.randrange(60, 125, 5)))
+            self.step("injuries", lambda at: by_label(at.sidebar.text_area, "List injuries").input(rng.choice(INJURIES)))
+            self.step("days", lambda at: by_label(at.sidebar.multiselect, "Choose training days").set_value(days))
+            self.step("seed", lambda at: by_label(at.sidebar.number_input, "Plan seed").set_value(rng.randrange(1, 1_000_000)))
+            self.step("generate", lambda at: by_label(at.button, "✨ Generate").click())
+            for day in rng.sample(days, min(3, len(days))):
+                self.step("view_day", lambda at, day=day: at.button(key=f"view_{day}").click())
+                if image_format:
+                    self.download(day)
+            retarget = rng.choice(days)
+            self.step("retarget", lambda at: by_label(at.multiselect, f"{retarget} targets").set_value(
+                rng.sample(["Chest", "Back", "Quads", "Glutes", "Shoulders", "Abs"], 2)))
+            self.step("regenerate", lambda at: by_label(at.button, "✨ Generate").click())
+
+    def state_bytes(self) -> int:
+        size = 0
+        for key in STATE_KEYS:
+            try:
+                size += len(pickle.dumps(self.at.session_state[key]))
+            except (KeyError, AttributeError, pickle.PicklingError):
+                pass
+        return size
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+_START = None  # per-worker barrier, set by _init_worker
+
+def _init_worker(barrier):
+    global _START
+    _START = barrier
+
+def drive(job) -> dict:
+    # Runs in a worker process: warm up, wait for the other sessions, run the flow, report samples
+    sid, seed, iterations, image_format, timeout = job
+    Session(f"{sid}-warmup", seed, timeout).step("load")  # imports and module-level caches
+    session = Session(sid, seed, timeout)
+    rss0 = rss_bytes()
+    _START.wait()  # all sessions begin together so they actually overlap
+    started = time.time()
+    session.run_flow(iterations, image_format)
+    return {
+        "started": started,
+        "finished": time.time(),
+        "latency": dict(session.latency),
+        "cpu": dict(session.cpu),
+        "errors": session.errors,
+        "state_bytes": session.state_bytes(),
+        "rss_growth": rss_bytes() - rss0,  # the session is still alive here, so its state counts
+    }
+
+def run_level(n_sessions: int, iterations: int, image_format: str, timeout: float, seed: int):
+    ctx = multiprocessing.get_context("spawn")
+    jobs = [(f"s{n_sessions}-{i}", seed + i, iterations, image_format, timeout) for i in range(n_sessions)]
+    with ctx.Pool(n_sessions, initializer=_init_worker, initargs=(ctx.Barrier(n_sessions),)) as pool:
+        results = pool.map(drive, jobs, chunksize=1)
+    elapsed = max(r["finished"] for r in results) - min(r["started"] for r in results)
+    rss_growth = sum(r["rss_growth"] for r in results)
+
+    latency, cpu = defaultdict(list), defaultdict(list)
+    for result in results:
+        for name, values in result["latency"].items():
+            latency[name].extend(values)
+        for name, values in result["cpu"].items():
+            cpu[name].extend(values)
+    interactions = sum(len(v) for v in latency.values())
+    errors = sum(r["errors"] for r in results)
+
+    print(f"\n=== {n_sessions} concurrent session(s) • {interactions} interactions in {elapsed:.1f}s "
+          f"({interactions / elapsed:.1f}/s) • app exceptions: {errors}")
+    header = f"{'step':<12}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'cpu p50':>10}{'cpu mean':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, values in latency.items():
+        print(f"{name:<12}{len(values):>6}{statistics.median(values):>10.1f}{percentile(values, 95):>10.1f}"
+              f"{percentile(values, 99):>10.1f}{max(values):>10.1f}{statistics.median(cpu[name]):>10.1f}"
+              f"{statistics.fmean(cpu[name]):>10.1f}")
+    state = statistics.fmean(r["state_bytes"] for r in results)
+    print(f"memory: RSS +{rss_growth / n_sessions / 1024:.0f} KiB per session "
+          f"(+{rss_growth / 2**20:.1f} MiB total) • session_state ≈ {state / 1024:.1f} KiB per session")
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 32], help="concurrent sessions per level")
+    parser.add_argument("--iterations", type=int, default=2, help="times each session repeats the flow")
+    parser.add_argument("--image-format", default="png", choices=["png", "svg", ""],
+                        help="app image format for the download step ('' to skip)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-rerun timeout (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        import streamlit.testing.v1  # noqa: F401
+    except ImportError:
+        sys.exit("streamlit (>= 1.28, with streamlit.testing) is required for this benchmark")
+    # Keep simulated history out of the real plan database, even when FORGE_PLAN_DB is set;
+    # session processes inherit this
+    db_dir = tempfile.mkdtemp(prefix="forge_load_")
+    os.environ["FORGE_PLAN_DB"] = os.path.join(db_dir, "plans.db")
+
+    errors = 0
+    try:
+        for n in args.sessions:
+            errors += run_level(n, args.iterations, args.image_format, args.timeout, args.seed)
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
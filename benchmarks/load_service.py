@@ -0,0 +1,125 @@
+"""Load-test client for workout_planner_service.
+
+    python benchmarks/load_service.py --spawn --concurrency 50 200 400 --requests 4000
+
+Each concurrency level opens that many keep-alive connections, each sending
+requests back to back, and reports throughput and p50/p95/p99 latency. Requests
+are drawn from ``--distinct`` payloads, so repeats exercise request coalescing
+and the plan cache. ``--spawn`` starts a service subprocess on ``--port``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_batch import make_roster  # noqa: E402
+
+def make_payloads(n: int, fmt: str):
+    payloads = []
+    for i, profile in enumerate(make_roster(n, seed=11)):
+        payloads.append(json.dumps({
+            "days": profile.days, "targets_by_day": profile.targets_by_day, "difficulty": profile.difficulty,
+            "duration": profile.duration, "injury_text": profile.injury_text, "seed": i + 1, "format": fmt,
+        }).encode("utf-8"))
+    return payloads
+
+async def request(reader, writer, host: str, method: str, path: str, body: bytes = b""):
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = next(int(line.split(":", 1)[1]) for line in lines[1:] if line.lower().startswith("content-length:"))
+    return status, await reader.readexactly(length)
+
+async def get_json(host: str, port: int, path: str):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, body = await request(reader, writer, host, "GET", path)
+        return json.loads(body)
+    finally:
+        writer.close()
+
+async def run_level(host: str, port: int, concurrency: int, total: int, payloads, rng: random.Random):
+    latencies = []
+    failures = 0
+    bodies = [rng.choice(payloads) for _ in range(total)]
+    queue = iter(bodies)
+
+    async def connection():
+        nonlocal failures
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for body in queue:  # shared iterator: connections pull the next request when free
+                t0 = time.perf_counter()
+                status, _ = await request(reader, writer, host, "POST", "/plan", body)
+                latencies.append(time.perf_counter() - t0)
+                failures += status != 200
+        finally:
+            writer.close()
+
+    before = (await get_json(host, port, "/stats"))["service"]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    after = (await get_json(host, port, "/stats"))["service"]
+
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1e3
+    print(f"c={concurrency:<5} {len(latencies) / elapsed:9.0f} req/s  p50 {pct(50):7.1f} ms  p95 {pct(95):7.1f} ms  "
+          f"p99 {pct(99):7.1f} ms  max {latencies[-1] * 1e3:7.1f} ms  "
+          f"coalesced {after['coalesced'] - before['coalesced']:<6} errors {failures}")
+
+async def wait_until_up(host: str, port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await get_json(host, port, "/health")
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+async def main_async(args):
+    health = await wait_until_up(args.host, args.port)
+    print(f"service up, catalog {health['catalog_version']}")
+    payloads = make_payloads(args.distinct, args.format)
+    rng = random.Random(3)
+    await run_level(args.host, args.port, min(args.concurrency), min(200, args.requests), payloads, rng)  # warm caches
+    for concurrency in args.concurrency:
+        await run_level(args.host, args.port, concurrency, args.requests, payloads, rng)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 100, 200, 400])
+    parser.add_argument("--requests", type=int, default=4000, help="requests per concurrency level")
+    parser.add_argument("--distinct", type=int, default=500, help="number of distinct request bodies")
+    parser.add_argument("--format", default="json", help="json, text, png, webp or svg")
+    parser.add_argument("--spawn", action="store_true", help="start the service in a subprocess")
+    parser.add_argument("--service-args", default="", help="extra arguments for the spawned service")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        service = os.path.join(os.path.dirname(__file__), "..", "workout_planner_service.py")
+        server = subprocess.Popen([sys.executable, service, "--host", args.host, "--port", str(args.port),
+                                   *args.service_args.split()])
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
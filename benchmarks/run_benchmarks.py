@@ -0,0 +1,263 @@
+"""Headless benchmark suite for the planner engine and export paths.
+
+    python benchmarks/run_benchmarks.py                      # run everything
+    python benchmarks/run_benchmarks.py -k plan_week --quick
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json --tolerance 0.15
+
+Every case uses fixed seeds. Catalog-sensitive cases run against synthetic
+catalogs scaled up from EXERCISES (40 entries -> 100k). Each case reports
+throughput, p50/p95/p99 latency and peak Python-heap memory (tracemalloc).
+Image cases also report peak RSS growth, since Pillow allocates its buffers
+in C where tracemalloc can't see them. --compare exits non-zero when a
+case's p50 regresses by more than --tolerance.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import workout_planner_core as core  # noqa: E402
+from workout_planner_core import (  # noqa: E402
+    EXERCISES, MUSCLE_GROUPS, WEEK_DAYS, Exercise, ExerciseCatalog,
+    build_day_plan, choose_exercises, plan_week, render_plan_text, tags_from_injury_text,
+)
+
+CATALOG_SIZES = [len(EXERCISES), 1_000, 10_000, 100_000]
+EXTRA_TAGS = ["barbell", "dumbbell", "cable", "machine", "band", "kettlebell", "smith", "unilateral"]
+INJURY_SAMPLES = ["", "knee pain", "lower back, wrist", "Feedback: tweaked my left shoulder and ACL last month",
+                  "tennis elbow; achilles tendinitis", "sore hamstrings after running"]
+
+# -----------------------
+# 🧪 Synthetic Inputs
+# -----------------------
+def scaled_catalog(size: int, seed: int = 0) -> ExerciseCatalog:
+    # Equipment variants of the real exercises, so tag/muscle/difficulty mixes stay realistic
+    if size <= len(EXERCISES):
+        return ExerciseCatalog(EXERCISES[:size])
+    rng = random.Random(seed)
+    out = list(EXERCISES)
+    while len(out) < size:
+        base = EXERCISES[len(out) % len(EXERCISES)]
+        tags = base.tags + rng.sample(EXTRA_TAGS, rng.randint(0, 2))
+        out.append(Exercise(f"{base.name} (variant {len(out)})", base.muscle,
+                            rng.choice(core.DIFFICULTIES), tags))
+    return ExerciseCatalog(out)
+
+def sample_week_inputs(rng: random.Random):
+    days = rng.sample(WEEK_DAYS, rng.randint(2, 6))
+    targets = {d: rng.sample(MUSCLE_GROUPS, rng.randint(1, 4)) for d in WEEK_DAYS}
+    return days, targets, rng.choice(core.DIFFICULTIES), rng.choice([60, 75, 90, 120])
+
+def plan_text(n_days: int, details: bool) -> str:
+    week = plan_week(None, WEEK_DAYS[:n_days], {d: ["Chest", "Back", "Quads"] for d in WEEK_DAYS},
+                     "Advanced", 120, [], seed=11)
+    return render_plan_text(week, show_details=details)
+
+# -----------------------
+# ⏱️ Measurement
+# -----------------------
+def current_rss() -> int:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def rss_peak_growth(fn: Callable[[int], object], iterations: int) -> Optional[float]:
+    # Sample RSS from a side thread while fn runs; catches C allocations tracemalloc misses
+    try:
+        base = current_rss()
+    except (OSError, ValueError):
+        return None
+    peak = base
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, current_rss())
+            time.sleep(0.001)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        for i in range(iterations):
+            fn(i)
+    finally:
+        done.set()
+        sampler.join()
+    return max(peak, current_rss()) - base
+
+def measure(fn: Callable[[int], object], iterations: int, warmup: int = 20, native: bool = False) -> Dict[str, float]:
+    for i in range(warmup):
+        fn(i)
+    gc.collect()
+    samples = []
+    for i in range(iterations):
+        t0 = time.perf_counter_ns()
+        fn(i)
+        samples.append(time.perf_counter_ns() - t0)
+    total_s = sum(samples) / 1e9
+
+    # Memory is traced in a separate pass; tracemalloc would skew the timings
+    tracemalloc.start()
+    for i in range(min(iterations, 50)):
+        fn(i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss = rss_peak_growth(fn, min(iterations, 10)) if native else None
+
+    q = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+    return {
+        "iterations": iterations,
+        "ops_per_s": iterations / total_s if total_s else float("inf"),
+        "p50_us": q[49] / 1e3,
+        "p95_us": q[94] / 1e3,
+        "p99_us": q[98] / 1e3,
+        "peak_kib": peak / 1024,  # Python heap only
+        "rss_kib": rss / 1024 if rss is not None else None,
+    }
+
+def build_cases(quick: bool) -> Dict[str, Callable[[], Dict[str, float]]]:
+    n = 200 if quick else 2000
+    image_iters = 5 if quick else max(n // 20, 20)  # each raster render is 0.1-0.4 s
+    cases: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    for size in CATALOG_SIZES:
+        if quick and size > 10_000:
+            continue
+        def catalog_cases(size=size):
+            catalog = scaled_catalog(size)
+            rng = random.Random(size)
+            inputs = [sample_week_inputs(rng) for _ in range(256)]
+            iters = max(n // (1 + size // 10_000), 50)
+            return catalog, inputs, iters
+
+        def choose(size=size):
+            catalog, inputs, iters = catalog_cases(size)
+            return measure(lambda i: choose_exercises(inputs[i % 256][1]["Monday"], inputs[i % 256][2], ["knee"], 6,
+                                                      catalog=catalog, rng=random.Random(i)), iters)
+
+        def day(size=size):
+            catalog, inputs, iters = catalog_cases(size)
+            return measure(lambda i: build_day_plan(inputs[i % 256][1]["Monday"], inputs[i % 256][2], inputs[i % 256][3],
+                                                    ["knee"], catalog=catalog, rng=random.Random(i)), iters)
+
+        def week(size=size):
+            catalog, inputs, iters = catalog_cases(size)
+            def run(i):
+                days, targets, difficulty, duration = inputs[i % 256]
+                plan_week(None, days, targets, difficulty, duration, ["shoulder"], seed=i, catalog=catalog)
+            return measure(run, iters)
+
+        cases[f"choose_exercises[catalog={size}]"] = choose
+        cases[f"build_day_plan[catalog={size}]"] = day
+        cases[f"plan_week[catalog={size}]"] = week
+
+    cases["tags_from_injury_text[cached]"] = lambda: measure(
+        lambda i: tags_from_injury_text(INJURY_SAMPLES[i % len(INJURY_SAMPLES)]), n * 5)
+    cases["tags_from_injury_text[uncached]"] = lambda: measure(
+        lambda i: core.INJURY_MATCHER._match(core.normalize_injury_text(f"{INJURY_SAMPLES[i % len(INJURY_SAMPLES)]} #{i}")), n * 5)
+
+    for n_days, details in [(3, False), (7, True)]:
+        label = f"days={n_days},details={details}"
+        def text_case(n_days=n_days, details=details):
+            week = plan_week(None, WEEK_DAYS[:n_days], {d: ["Chest", "Back", "Quads"] for d in WEEK_DAYS},
+                             "Advanced", 120, [], seed=3)
+            return measure(lambda i: render_plan_text(week, show_details=details), n)
+        cases[f"render_plan_text[{label}]"] = text_case
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("Pillow not installed: skipping plan_to_png cases", file=sys.stderr)
+    else:
+        for n_days, details in [(1, True), (3, False), (7, True)]:
+            label = f"days={n_days},details={details}"
+            def png_case(n_days=n_days, details=details):
+                text = plan_text(n_days, details)
+                return measure(lambda i: core.plan_to_png(text, title="Weekly Workout Plan"), image_iters,
+                               warmup=1 if quick else 3, native=True)
+            cases[f"plan_to_png[{label}]"] = png_case
+        for fmt, speed in [("png", "fast"), ("png", "small"), ("webp", "fast"), ("webp", "small")]:
+            def image_case(fmt=fmt, speed=speed):
+                text = plan_text(7, True)
+                return measure(lambda i: core.render_plan_images(text, fmt=fmt, speed=speed, max_height=1600),
+                               image_iters, warmup=1 if quick else 3, native=True)
+            cases[f"render_plan_images[{fmt},{speed}]"] = image_case
+
+    def svg_case():
+        text = plan_text(7, True)
+        return measure(lambda i: core.render_plan_images(text, fmt="svg"), n)
+    cases["render_plan_images[svg]"] = svg_case
+    return cases
+
+# -----------------------
+# 📊 Reporting
+# -----------------------
+def print_table(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None):
+    header = f"{'case':<44}{'ops/s':>12}{'p50 us':>11}{'p95 us':>11}{'p99 us':>11}{'py KiB':>11}{'rss+ KiB':>11}"
+    if baseline:
+        header += f"{'Δp50':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        rss = r.get("rss_kib")
+        line = (f"{name:<44}{r['ops_per_s']:>12.0f}{r['p50_us']:>11.1f}{r['p95_us']:>11.1f}{r['p99_us']:>11.1f}"
+                f"{r['peak_kib']:>11.1f}{'-' if rss is None else f'{rss:.1f}':>11}")
+        if baseline and name in baseline:
+            line += f"{(r['p50_us'] / baseline[name]['p50_us'] - 1) * 100:>8.1f}%"
+        print(line)
+
+def regressions(results, baseline, tolerance: float) -> List[str]:
+    out = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and r["p50_us"] > base["p50_us"] * (1 + tolerance):
+            out.append(f"{name}: p50 {base['p50_us']:.1f}us -> {r['p50_us']:.1f}us")
+    return out
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Planner benchmark suite")
+    parser.add_argument("-k", dest="pattern", default="", help="only run cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, skip the 100k catalog")
+    parser.add_argument("--save", metavar="PATH", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p50 slowdown before failing")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, case in build_cases(args.quick).items():
+        if args.pattern in name:
+            results[name] = case()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)["results"]
+    print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, fh, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if baseline:
+        failed = regressions(results, baseline, args.tolerance)
+        if failed:
+            print("\nRegressions:\n  " + "\n  ".join(failed))
+            return 1
+        print(f"\nNo regressions beyond {args.tolerance:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
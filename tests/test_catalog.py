@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from workout_planner_catalog import CatalogSource, export_builtin, parse_catalog  # noqa: E402
+
+def _rewrite(path, content: str) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(content)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))  # make sure the stamp changes
+
+@pytest.mark.parametrize("content", [
+    "42",
+    '{"exercises": 42}',
+    '{"exercises": [{"name": "Push-Up"}]}',
+    '{"exercises": [{"name": "A", "muscle": "Chest", "difficulty": "Beginner"}], "injury_tags": {"knee": "knee"}}',
+    "{not json",
+])
+def test_failed_reload_keeps_previous_bundle(tmp_path, content):
+    path = tmp_path / "catalog.json"
+    export_builtin(str(path))
+    source = CatalogSource(str(path), check_interval=0)
+    before = source.get()
+
+    _rewrite(path, content)
+    assert source.get() is before
+    assert source.last_error
+    assert source.reloads == 0
+
+@pytest.mark.parametrize("content", ["42", "[1, 2]", '{"muscle_groups": "Chest", "exercises": []}'])
+def test_wrong_shape_json_is_a_value_error(tmp_path, content):
+    path = tmp_path / "catalog.json"
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError):
+        parse_catalog(str(path))
+
+def test_csv_missing_column_is_a_value_error(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text("name,muscle\nPush-Up,Chest\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="difficulty"):
+        parse_catalog(str(path))
+
+def test_invalid_yaml_is_a_value_error(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "catalog.yaml"
+    path.write_text("exercises: [unclosed\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        parse_catalog(str(path))
+
+def test_reload_picks_up_a_good_edit(tmp_path):
+    path = tmp_path / "catalog.json"
+    export_builtin(str(path))
+    source = CatalogSource(str(path), check_interval=0)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["exercises"] = data["exercises"][:5]
+    _rewrite(path, json.dumps(data))
+    assert len(source.get().catalog) == 5
+    assert source.reloads == 1
@@ -0,0 +1,360 @@
+"""Loadable exercise catalogs with a compiled binary cache.
+
+A catalog source is a JSON, YAML or CSV file::
+
+    {"muscle_groups": ["Chest", ...],            # optional, defaults to first-seen order
+     "injury_tags": {"knee": ["knee"], ...},     # optional, defaults to the built-in map
+     "injury_synonyms": {"acl": "knee", ...},    # optional
+     "exercises": [{"name": "Push-Up", "muscle": "Chest",
+                    "difficulty": "Beginner", "tags": ["bodyweight"]}, ...]}
+
+CSV files have ``name,muscle,difficulty,tags`` columns (tags separated by ``;``).
+The first load compiles the source into ``<source>.forgecat``: a string table,
+per-exercise id arrays and the muscle/difficulty/tag posting lists, stored as
+flat uint32 arrays. Later loads mmap that file and build the catalog straight
+from it without re-parsing or re-indexing. The mmap is only a fast read path:
+its contents are copied into ordinary Python objects and it is closed before
+the load returns, so each process holds its own copy of the catalog. The
+cache is rebuilt whenever the source's mtime or size changes, or when it
+can't be read (truncated, empty or corrupt), and CatalogSource reloads on
+the fly.
+
+Set FORGE_CATALOG_PATH to serve a catalog file instead of the built-in library.
+
+    python workout_planner_catalog.py export-builtin exercises.json
+    python workout_planner_catalog.py compile exercises.json
+"""
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from workout_planner_core import (
+    CATALOG, DIFFICULTIES, EXERCISES, INJURY_MATCHER, INJURY_SYNONYMS, INJURY_TAGS, MUSCLE_GROUPS,
+    Exercise, ExerciseCatalog, InjuryMatcher,
+)
+
+CACHE_SUFFIX = ".forgecat"
+CACHE_MAGIC = b"FGCAT\x00\x01\x00"
+_HEADER = struct.Struct("<8sqqI")  # magic, source mtime_ns, source size, metadata length
+
+@dataclass
+class CatalogBundle:
+    """A catalog plus the vocabulary that travels with it."""
+    catalog: ExerciseCatalog
+    muscle_groups: List[str]
+    injury_tags: Dict[str, List[str]]
+    injury_matcher: InjuryMatcher
+    source: Optional[str] = None
+
+BUILTIN = CatalogBundle(CATALOG, MUSCLE_GROUPS, INJURY_TAGS, INJURY_MATCHER)
+
+# -----------------------
+# 📄 Source Parsing
+# -----------------------
+CSV_COLUMNS = ("name", "muscle", "difficulty")
+
+def _read_source(path: str) -> dict:
+    # Every malformed-file error surfaces as ValueError, which CatalogSource treats as a failed reload
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, newline="", encoding="utf-8") as fh:
+            reader = csv.DictReader(fh)
+            missing = [c for c in CSV_COLUMNS if c not in (reader.fieldnames or ())]
+            if missing:
+                raise ValueError(f"{path}: CSV catalog is missing column(s) {', '.join(missing)}")
+            try:
+                rows = [{"name": r["name"], "muscle": r["muscle"], "difficulty": r["difficulty"],
+                         "tags": [t.strip() for t in (r.get("tags") or "").split(";") if t.strip()]}
+                        for r in reader]
+            except csv.Error as e:
+                raise ValueError(f"{path}: {e}") from None
+        return {"exercises": rows}
+    with open(path, encoding="utf-8") as fh:
+        if ext in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("Loading YAML catalogs requires PyYAML (pip install pyyaml)") from None
+            try:
+                data = yaml.safe_load(fh)
+            except yaml.YAMLError as e:
+                raise ValueError(f"{path}: invalid YAML: {e}") from None
+        else:
+            data = json.load(fh)
+    if isinstance(data, list):
+        return {"exercises": data}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: catalog must be an object or a list of exercises, got {type(data).__name__}")
+    return data
+
+def _check_shape(path: str, data: dict) -> None:
+    if not isinstance(data.get("exercises") or [], list):
+        raise ValueError(f"{path}: 'exercises' must be a list")
+    groups = data.get("muscle_groups") or []
+    if not isinstance(groups, list) or not all(isinstance(g, str) for g in groups):
+        raise ValueError(f"{path}: 'muscle_groups' must be a list of strings")
+    tags = data.get("injury_tags") or {}
+    if not isinstance(tags, dict) or not all(
+            isinstance(v, list) and all(isinstance(t, str) for t in v) for v in tags.values()):
+        raise ValueError(f"{path}: 'injury_tags' must map names to lists of tags")
+    synonyms = data.get("injury_synonyms") or {}
+    if not isinstance(synonyms, dict) or not all(isinstance(v, str) for v in synonyms.values()):
+        raise ValueError(f"{path}: 'injury_synonyms' must map phrases to strings")
+
+def parse_catalog(path: str) -> Tuple[List[Exercise], List[str], Dict[str, List[str]], Dict[str, str]]:
+    data = _read_source(path)
+    _check_shape(path, data)
+    exercises = []
+    for i, row in enumerate(data.get("exercises") or []):
+        try:
+            ex = Exercise(str(row["name"]), str(row["muscle"]), str(row["difficulty"]), [str(t) for t in row.get("tags") or []])
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"{path}: exercise #{i} is missing {e}") from None
+        if ex.difficulty not in DIFFICULTIES:
+            raise ValueError(f"{path}: exercise #{i} ({ex.name}) has unknown difficulty {ex.difficulty!r}")
+        exercises.append(ex)
+    if not exercises:
+        raise ValueError(f"{path}: catalog has no exercises")
+    muscle_groups = list(data.get("muscle_groups") or dict.fromkeys(ex.muscle for ex in exercises))
+    injury_tags = data.get("injury_tags") or INJURY_TAGS
+    synonyms = data.get("injury_synonyms") or (INJURY_SYNONYMS if "injury_tags" not in data else {})
+    return exercises, muscle_groups, injury_tags, synonyms
+
+# -----------------------
+# 🧱 Compiled Cache
+# -----------------------
+def cache_path_for(source: str) -> str:
+    cache_dir = os.environ.get("FORGE_CATALOG_CACHE_DIR")
+    if cache_dir:
+        return os.path.join(cache_dir, os.path.basename(source) + CACHE_SUFFIX)
+    return source + CACHE_SUFFIX
+
+def _postings(index: Dict[str, frozenset], string_id: Dict[str, int]) -> Tuple[array, array, array]:
+    keys, offsets, postings = array("I"), array("I", [0]), array("I")
+    for key, members in index.items():
+        keys.append(string_id[key])
+        postings.extend(sorted(members))
+        offsets.append(len(postings))
+    return keys, offsets, postings
+
+def write_cache(catalog: ExerciseCatalog, muscle_groups: List[str], injury_tags: Dict[str, List[str]],
+                synonyms: Dict[str, str], cache_path: str, source_stat: os.stat_result) -> None:
+    strings: Dict[str, int] = {}
+    def sid(s: str) -> int:
+        return strings.setdefault(s, len(strings))
+
+    n = len(catalog.exercises)
+    name_ids, muscle_ids, difficulty_ids = array("I"), array("I"), array("I")
+    tag_offsets, tag_ids = array("I", [0]), array("I")
+    for ex in catalog.exercises:
+        name_ids.append(sid(ex.name))
+        muscle_ids.append(sid(ex.muscle))
+        difficulty_ids.append(sid(ex.difficulty))
+        tag_ids.extend(sid(t) for t in ex.tags)
+        tag_offsets.append(len(tag_ids))
+
+    sections = [name_ids, muscle_ids, difficulty_ids, tag_offsets, tag_ids]
+    for index in (catalog.by_muscle, catalog.by_difficulty, catalog.by_tag):
+        sections.extend(_postings(index, strings))
+
+    blob = bytearray()
+    str_offsets = array("I", [0])
+    for s in strings:  # insertion order == id order
+        blob += s.encode("utf-8")
+        str_offsets.append(len(blob))
+    blob += b"\x00" * (-len(blob) % 4)  # keep the uint32 sections aligned
+    sections = [str_offsets] + sections
+
+    meta = json.dumps({
+        "version": catalog.version, "count": n, "byteorder": sys.byteorder,
+        "blob_len": len(blob), "sections": [len(a) for a in sections],
+        "muscle_groups": muscle_groups, "injury_tags": injury_tags, "injury_synonyms": synonyms,
+    }).encode("utf-8")
+    meta += b" " * (-(len(meta) + _HEADER.size) % 4)
+
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(CACHE_MAGIC, source_stat.st_mtime_ns, source_stat.st_size, len(meta)))
+        fh.write(meta)
+        fh.write(blob)
+        for a in sections:
+            fh.write(a.tobytes())
+    os.replace(tmp, cache_path)  # readers never see a half-written cache
+
+def read_cache(cache_path: str, source_stat: os.stat_result) -> Optional[CatalogBundle]:
+    """Build a bundle from a compiled cache, or None if it is missing, stale or unreadable."""
+    try:
+        return _read_cache(cache_path, source_stat)
+    except (struct.error, ValueError, OSError, KeyError, IndexError, TypeError):
+        # Empty or truncated files fail in mmap/unpack/cast, corrupt ones in json/utf-8/indexing;
+        # either way the caller recompiles and overwrites it
+        return None
+
+def _read_cache(cache_path: str, source_stat: os.stat_result) -> Optional[CatalogBundle]:
+    try:
+        fh = open(cache_path, "rb")
+    except OSError:
+        return None
+    with fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, mtime_ns, size, meta_len = _HEADER.unpack_from(mm, 0)
+        if magic != CACHE_MAGIC or mtime_ns != source_stat.st_mtime_ns or size != source_stat.st_size:
+            return None
+        pos = _HEADER.size
+        meta = json.loads(bytes(mm[pos:pos + meta_len]))
+        if meta["byteorder"] != sys.byteorder:
+            return None
+        pos += meta_len
+        views: List[memoryview] = [memoryview(mm)]
+        def take(nbytes: int, fmt: Optional[str] = None) -> memoryview:
+            nonlocal pos
+            v = views[0][pos:pos + nbytes]
+            views.append(v)
+            if fmt:
+                v = v.cast(fmt)
+                views.append(v)
+            pos += nbytes
+            return v
+        try:
+            blob = take(meta["blob_len"])
+            sections = [take(4 * length, "I") for length in meta["sections"]]
+            str_offsets, name_ids, muscle_ids, difficulty_ids, tag_offsets, tag_ids = sections[:6]
+            strings = [str(blob[str_offsets[i]:str_offsets[i + 1]], "utf-8") for i in range(len(str_offsets) - 1)]
+
+            exercises = [
+                Exercise(strings[name_ids[i]], strings[muscle_ids[i]], strings[difficulty_ids[i]],
+                         [strings[t] for t in tag_ids[tag_offsets[i]:tag_offsets[i + 1]]])
+                for i in range(meta["count"])
+            ]
+            indexes = []
+            for k in range(3):
+                keys, offsets, postings = sections[6 + 3 * k: 9 + 3 * k]
+                indexes.append({strings[key]: frozenset(postings[offsets[j]:offsets[j + 1]]) for j, key in enumerate(keys)})
+        finally:
+            # The mmap can only close once every view onto it is released
+            for v in reversed(views):
+                v.release()
+
+    catalog = ExerciseCatalog.from_indexes(exercises, *indexes, version=meta["version"])
+    return CatalogBundle(catalog, meta["muscle_groups"], meta["injury_tags"],
+                         InjuryMatcher(meta["injury_tags"], meta["injury_synonyms"]), cache_path)
+
+def load_catalog(path: str) -> CatalogBundle:
+    """Load ``path`` through its compiled cache, compiling it first if needed."""
+    st = os.stat(path)
+    cache_path = cache_path_for(path)
+    bundle = read_cache(cache_path, st)
+    if bundle is not None:
+        bundle.source = path
+        return bundle
+    exercises, muscle_groups, injury_tags, synonyms = parse_catalog(path)
+    catalog = ExerciseCatalog(exercises)
+    try:
+        write_cache(catalog, muscle_groups, injury_tags, synonyms, cache_path, st)
+    except OSError:
+        pass  # read-only deployments still work, just without the fast path
+    return CatalogBundle(catalog, muscle_groups, injury_tags, InjuryMatcher(injury_tags, synonyms), path)
+
+# -----------------------
+# 🔄 Hot Reload
+# -----------------------
+class CatalogSource:
+    """Serves the current bundle for one file and reloads it when the file changes.
+
+    The file is stat'ed at most once per ``check_interval`` seconds. Readers
+    always get a fully built bundle; a failed reload keeps the previous one.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stamp = self._stat()
+        self._bundle = load_catalog(path)
+        self._checked = time.monotonic()
+
+    def _stat(self) -> Tuple[int, int]:
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self) -> CatalogBundle:
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._bundle
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return self._bundle
+            self._checked = now
+            try:
+                stamp = self._stat()
+                if stamp != self._stamp:
+                    self._bundle = load_catalog(self.path)
+                    self._stamp = stamp
+                    self.reloads += 1
+                    self.last_error = None
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+        return self._bundle
+
+_SOURCES: Dict[str, CatalogSource] = {}
+_SOURCES_LOCK = threading.Lock()
+
+def catalog_source(path: str) -> CatalogSource:
+    # One source per file per process, so every session shares the same catalog objects
+    path = os.path.abspath(path)
+    with _SOURCES_LOCK:
+        source = _SOURCES.get(path)
+        if source is None:
+            source = _SOURCES[path] = CatalogSource(path)
+        return source
+
+def get_catalog_bundle(path: Optional[str] = None) -> CatalogBundle:
+    path = path or os.environ.get("FORGE_CATALOG_PATH")
+    if not path:
+        return BUILTIN
+    return catalog_source(path).get()
+
+# -----------------------
+# 🛠️ CLI
+# -----------------------
+def export_builtin(path: str) -> None:
+    data = {
+        "muscle_groups": MUSCLE_GROUPS,
+        "injury_tags": INJURY_TAGS,
+        "injury_synonyms": INJURY_SYNONYMS,
+        "exercises": [{"name": ex.name, "muscle": ex.muscle, "difficulty": ex.difficulty, "tags": ex.tags} for ex in EXERCISES],
+    }
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, ensure_ascii=False)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage ForgeFitness exercise catalogs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("export-builtin", help="write the built-in library as JSON").add_argument("path")
+    sub.add_parser("compile", help="(re)build the compiled cache for a catalog file").add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "export-builtin":
+        export_builtin(args.path)
+        print(f"Wrote {len(EXERCISES)} exercises to {args.path}")
+        return 0
+    t0 = time.perf_counter()
+    cache_path = cache_path_for(args.path)
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+    bundle = load_catalog(args.path)
+    print(f"Compiled {len(bundle.catalog)} exercises into {cache_path} in {time.perf_counter() - t0:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,970 @@
+"""ForgeFitness planner core: exercise library, planning engine and exports.
+
+Importable without Streamlit; Pillow is only loaded when an image is rendered.
+The Streamlit UI in ``workout_planner_streamlit.py`` is a thin layer on top.
+"""
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, FrozenSet, Optional
+from collections import OrderedDict
+from array import array
+from functools import lru_cache
+import random
+from datetime import datetime
+import io
+import re
+import textwrap
+import hashlib
+import threading
+import time
+import weakref
+
+# -----------------------
+# 🧠 Exercise Library
+# -----------------------
+@dataclass
+class Exercise:
+    name: str
+    muscle: str
+    difficulty: str  # "Beginner" | "Intermediate" | "Advanced"
+    tags: List[str]
+
+EXERCISES: List[Exercise] = [
+    # Chest
+    Exercise("Push-Up", "Chest", "Beginner", ["bodyweight", "shoulder", "wrist"]),
+    Exercise("Incline Dumbbell Press", "Chest", "Intermediate", ["shoulder"]),
+    Exercise("Barbell Bench Press", "Chest", "Intermediate", ["shoulder", "barbell"]),
+    Exercise("Machine Chest Press", "Chest", "Beginner", ["machine", "shoulder"]),
+    Exercise("Cable Fly", "Chest", "Intermediate", ["shoulder", "cable"]),
+
+    # Back
+    Exercise("Lat Pulldown", "Back", "Beginner", ["shoulder", "machine"]),
+    Exercise("Seated Cable Row", "Back", "Beginner", ["lower-back", "cable"]),
+    Exercise("Pull-Up", "Back", "Advanced", ["shoulder", "grip"]),
+    Exercise("Barbell Bent-Over Row", "Back", "Intermediate", ["lower-back", "barbell"]),
+    Exercise("Single-Arm Dumbbell Row", "Back", "Beginner", ["lower-back", "dumbbell"]),
+
+    # Shoulders
+    Exercise("Dumbbell Shoulder Press", "Shoulders", "Intermediate", ["shoulder", "spine"]),
+    Exercise("Lateral Raise", "Shoulders", "Beginner", ["shoulder"]),
+    Exercise("Face Pull", "Shoulders", "Beginner", ["shoulder", "cable"]),
+    Exercise("Arnold Press", "Shoulders", "Advanced", ["shoulder"]),
+
+    # Biceps
+    Exercise("EZ-Bar Curl", "Biceps", "Beginner", ["elbow", "barbell"]),
+    Exercise("Dumbbell Curl", "Biceps", "Beginner", ["elbow", "dumbbell"]),
+    Exercise("Incline Dumbbell Curl", "Biceps", "Intermediate", ["elbow"]),
+    Exercise("Cable Curl", "Biceps", "Intermediate", ["elbow", "cable"]),
+
+    # Triceps
+    Exercise("Cable Triceps Pushdown", "Triceps", "Beginner", ["elbow", "cable"]),
+    Exercise("Overhead Triceps Extension", "Triceps", "Intermediate", ["shoulder", "elbow"]),
+    Exercise("Close-Grip Bench Press", "Triceps", "Advanced", ["shoulder", "elbow", "barbell"]),
+
+    # Legs: Quads, Hamstrings, Calves, Glutes
+    Exercise("Back Squat", "Quads", "Advanced", ["knee", "spine", "barbell"]),
+    Exercise("Front Squat", "Quads", "Advanced", ["knee", "spine", "barbell"]),
+    Exercise("Leg Press", "Quads", "Beginner", ["knee", "machine"]),
+    Exercise("Walking Lunges", "Quads", "Intermediate", ["knee", "balance"]),
+    Exercise("Romanian Deadlift", "Hamstrings", "Intermediate", ["hamstrings", "hip-hinge", "spine", "barbell"]),
+    Exercise("Hamstring Curl (Machine)", "Hamstrings", "Beginner", ["machine", "knee"]),
+    Exercise("Hip Thrust", "Glutes", "Beginner", ["hip"]),
+    Exercise("Calf Raise (Standing)", "Calves", "Beginner", ["ankle"]),
+    Exercise("Seated Calf Raise", "Calves", "Beginner", ["ankle", "machine"]),
+
+    # Core
+    Exercise("Plank", "Abs", "Beginner", ["wrist", "shoulder"]),
+    Exercise("Hanging Knee Raise", "Abs", "Intermediate", ["shoulder", "grip"]),
+    Exercise("Cable Woodchop", "Abs", "Intermediate", ["spine", "cable"]),
+    Exercise("Bicycle Crunch", "Abs", "Beginner", []),
+
+    # Forearms
+    Exercise("Reverse Curl", "Forearms", "Beginner", ["wrist", "elbow"]),
+    Exercise("Farmer's Carry", "Forearms", "Intermediate", ["grip"]),
+
+    # Cardio / Weight loss helpers
+    Exercise("Treadmill Intervals", "Cardio", "Beginner", ["cardio", "knee"]),
+    Exercise("Stationary Bike", "Cardio", "Beginner", ["cardio", "knee-friendly"]),
+    Exercise("Rowing Machine", "Cardio", "Intermediate", ["cardio", "back", "shoulder"]),
+    Exercise("Jump Rope", "Cardio", "Intermediate", ["cardio", "ankle"]),
+]
+
+# -----------------------
+# 📇 Indexed Catalog
+# -----------------------
+# Which exercise tiers each selected difficulty may draw from
+DIFFICULTY_POOLS: Dict[str, Tuple[str, ...]] = {
+    "Beginner": ("Beginner", "Intermediate"),
+    "Intermediate": ("Beginner", "Intermediate", "Advanced"),
+    "Advanced": ("Beginner", "Intermediate", "Advanced"),
+}
+
+# Live catalogs by version (weak, so replaced catalogs can be collected)
+_CATALOGS: "weakref.WeakValueDictionary[str, ExerciseCatalog]" = weakref.WeakValueDictionary()
+
+def catalog_for_version(version: str) -> "ExerciseCatalog":
+    catalog = _CATALOGS.get(version)
+    if catalog is None:
+        raise LookupError(f"Exercise catalog {version} is not loaded in this process")
+    return catalog
+
+class ExerciseCatalog:
+    """Exercise list with precomputed muscle / difficulty / tag indexes.
+
+    Indexes map a key to the frozenset of catalog positions, so candidate pools
+    are built with set algebra instead of scanning every exercise.
+    """
+
+    def __init__(self, exercises: List[Exercise]):
+        self.exercises: List[Exercise] = list(exercises)
+        by_muscle: Dict[str, set] = {}
+        by_difficulty: Dict[str, set] = {}
+        by_tag: Dict[str, set] = {}
+        for i, ex in enumerate(self.exercises):
+            by_muscle.setdefault(ex.muscle, set()).add(i)
+            by_difficulty.setdefault(ex.difficulty, set()).add(i)
+            for tag in ex.tags:
+                by_tag.setdefault(tag, set()).add(i)
+        self.by_muscle: Dict[str, FrozenSet[int]] = {k: frozenset(v) for k, v in by_muscle.items()}
+        self.by_difficulty: Dict[str, FrozenSet[int]] = {k: frozenset(v) for k, v in by_difficulty.items()}
+        self.by_tag: Dict[str, FrozenSet[int]] = {k: frozenset(v) for k, v in by_tag.items()}
+        # Content fingerprint; cached plans are only valid for the catalog that built them
+        raw = repr([(ex.name, ex.muscle, ex.difficulty, tuple(ex.tags)) for ex in self.exercises])
+        self.version = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+        # Plans pickle a catalog by version, so it must be resolvable in the receiving process
+        _CATALOGS[self.version] = self
+
+    @classmethod
+    def from_indexes(cls, exercises: List[Exercise], by_muscle: Dict[str, FrozenSet[int]],
+                     by_difficulty: Dict[str, FrozenSet[int]], by_tag: Dict[str, FrozenSet[int]],
+                     version: str) -> "ExerciseCatalog":
+        # Used by the compiled catalog cache: indexes and version are already known
+        self = cls.__new__(cls)
+        self.exercises = exercises
+        self.by_muscle, self.by_difficulty, self.by_tag = by_muscle, by_difficulty, by_tag
+        self.version = version
+        _CATALOGS[version] = self
+        return self
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+    def candidate_indexes(self, targets: List[str], difficulty: str, avoid_tags: List[str]) -> List[int]:
+        empty: FrozenSet[int] = frozenset()
+        pool = empty.union(*(self.by_muscle.get(m, empty) for m in targets))
+        tiers = DIFFICULTY_POOLS.get(difficulty)
+        if tiers is not None:
+            pool &= empty.union(*(self.by_difficulty.get(d, empty) for d in tiers))
+        if avoid_tags:
+            pool -= empty.union(*(self.by_tag.get(t, empty) for t in avoid_tags))
+        # Catalog order keeps selection identical to a linear scan for the same seed
+        return sorted(pool)
+
+    def candidates(self, targets: List[str], difficulty: str, avoid_tags: List[str]) -> List[Exercise]:
+        return [self.exercises[i] for i in self.candidate_indexes(targets, difficulty, avoid_tags)]
+
+CATALOG = ExerciseCatalog(EXERCISES)
+
+MUSCLE_GROUPS = ["Chest","Back","Shoulders","Biceps","Triceps","Abs","Calves","Quads","Hamstrings","Glutes","Forearms","Cardio"]
+DIFFICULTIES = ["Beginner","Intermediate","Advanced"]
+WEEK_DAYS = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+
+# Injury keyword map -> tags to avoid
+INJURY_TAGS = {
+    "shoulder": ["shoulder","overhead"],
+    "elbow": ["elbow"],
+    "wrist": ["wrist"],
+    "knee": ["knee"],
+    "ankle": ["ankle"],
+    "lower back": ["lower-back","spine","deadlift","hip-hinge"],
+    "back": ["lower-back","spine","back"],
+    "neck": ["neck","overhead"],
+    "hip": ["hip","hip-hinge"],
+    "hamstring": ["hamstring","hamstrings"],
+    "achilles": ["achilles","ankle"],
+}
+
+# Extra phrasings -> INJURY_TAGS key they mean (plural "s" is matched automatically)
+INJURY_SYNONYMS = {
+    "rotator cuff": "shoulder", "delt": "shoulder", "ac joint": "shoulder", "frozen shoulder": "shoulder",
+    "labrum": "shoulder", "impingement": "shoulder",
+    "tennis elbow": "elbow", "golfer's elbow": "elbow", "golfers elbow": "elbow",
+    "carpal tunnel": "wrist", "forearm splint": "wrist",
+    "acl": "knee", "mcl": "knee", "pcl": "knee", "meniscus": "knee", "patella": "knee", "patellar": "knee",
+    "runner's knee": "knee", "jumper's knee": "knee", "it band": "knee",
+    "sprained ankle": "ankle", "rolled ankle": "ankle", "plantar fasciitis": "ankle", "shin splint": "ankle",
+    "lumbar": "lower back", "sciatica": "lower back", "herniated disc": "lower back", "slipped disc": "lower back",
+    "bulging disc": "lower back", "si joint": "lower back", "lowerback": "lower back",
+    "spine": "back", "upper back": "back", "thoracic": "back",
+    "cervical": "neck", "whiplash": "neck", "stiff neck": "neck",
+    "hip flexor": "hip", "groin": "hip", "labral tear": "hip",
+    "hammy": "hamstring", "pulled hamstring": "hamstring",
+    "achilles tendon": "achilles", "achilles tendinitis": "achilles",
+}
+
+# -----------------------
+# 🧮 Helper Functions
+# -----------------------
+# Per-difficulty constants, looked up rather than recomputed per plan
+# Harder = slightly longer sets & rests
+SET_MINUTES: Dict[str, float] = {
+    "Beginner": 0.5 + 1.0,      # 0.5 set + 1.0 rest = 1.5
+    "Intermediate": 0.6 + 1.2,  # 1.8
+    "Advanced": 0.7 + 1.5,      # 2.2
+}
+WARMUP_COOLDOWN: Dict[str, Tuple[int, int]] = {
+    "Beginner": (8, 8),
+    "Intermediate": (10, 10),
+    "Advanced": (12, 12),
+}
+
+# Rep targets drawn per exercise, and rest guidance (seconds) by difficulty
+REP_CHOICES = (8, 10, 12)
+REST_SECONDS: Dict[str, int] = {"Beginner": 60, "Intermediate": 75, "Advanced": 90}
+REST_STEPS: Dict[str, str] = {d: f"Rest • {int(r/60)}–{int((r+30)/60)} min" for d, r in REST_SECONDS.items()}
+
+def estimate_set_minutes(difficulty: str) -> float:
+    return SET_MINUTES.get(difficulty, SET_MINUTES["Advanced"])
+
+def warmup_cooldown_minutes(difficulty: str) -> Tuple[int, int]:
+    return WARMUP_COOLDOWN.get(difficulty, WARMUP_COOLDOWN["Advanced"])
+
+def candidate_pool(targets: List[str], difficulty: str, avoid_tags: List[str],
+                   catalog: "ExerciseCatalog" = None, pools: Optional[dict] = None) -> Tuple[List[int], Dict[str, List[int]]]:
+    # Returns (pool, pool grouped by muscle) as catalog indexes; `pools` memoizes results across calls
+    catalog = catalog or CATALOG
+    key = (tuple(targets), difficulty, frozenset(avoid_tags or ()))
+    if pools is not None and key in pools:
+        return pools[key]
+    pool = catalog.candidate_indexes(targets, difficulty, avoid_tags)
+
+    # Ensure diversity by muscle (pool is in catalog order, so each bucket is too)
+    exercises = catalog.exercises
+    by_muscle: Dict[str, List[int]] = {}
+    for i in pool:
+        by_muscle.setdefault(exercises[i].muscle, []).append(i)
+    if pools is not None:
+        pools[key] = (pool, by_muscle)
+    return pool, by_muscle
+
+def choose_exercises(targets: List[str], difficulty: str, avoid_tags: List[str], n: int,
+                     catalog: "ExerciseCatalog" = None, rng: Optional[random.Random] = None,
+                     pools: Optional[dict] = None) -> List[Exercise]:
+    catalog = catalog or CATALOG
+    return [catalog.exercises[i] for i in choose_exercise_indexes(targets, difficulty, avoid_tags, n, catalog, rng, pools)]
+
+def choose_exercise_indexes(targets: List[str], difficulty: str, avoid_tags: List[str], n: int,
+                            catalog: "ExerciseCatalog" = None, rng: Optional[random.Random] = None,
+                            pools: Optional[dict] = None, exclude: FrozenSet[int] = frozenset()) -> List[int]:
+    # `exclude` holds indexes to skip while others remain (exercise rotation); they only back-fill short pools
+    catalog = catalog or CATALOG
+    rng = rng or random
+    exercises = catalog.exercises
+    pool, by_muscle = candidate_pool(targets, difficulty, avoid_tags, catalog=catalog, pools=pools)
+
+    # Round-robin pick across muscles, drawing without replacement
+    selected = []
+    chosen = set()
+    muscles = [m for m in targets if m in by_muscle]
+    if not muscles and pool:
+        muscles = [exercises[pool[0]].muscle]
+    if exclude:
+        buckets = {m: [i for i in by_muscle.get(m, ()) if i not in exclude] for m in muscles}
+    else:
+        buckets = {m: list(by_muscle.get(m, ())) for m in muscles}
+    while len(selected) < n and muscles:
+        for m in muscles:
+            if len(selected) >= n:
+                break
+            bucket = buckets[m]
+            while bucket:
+                choice = bucket.pop(rng.randrange(len(bucket)))
+                # prevent duplicates by name
+                name = exercises[choice].name
+                if name not in chosen:
+                    selected.append(choice)
+                    chosen.add(name)
+                    break
+        muscles = [m for m in muscles if buckets[m]]
+    # If still short, fill randomly
+    if len(selected) < n:
+        remainder = [i for i in pool if exercises[i].name not in chosen]
+        rng.shuffle(remainder)
+        if exclude:
+            remainder.sort(key=exclude.__contains__)  # stable: fresh exercises first, still shuffled
+        selected += remainder[: (n - len(selected))]
+    return selected[:n]
+
+# -----------------------
+# ⏱️ Duration Fitting
+# -----------------------
+# Session shape bounds: exercises per day and sets per exercise (8-12 reps each)
+MIN_EXERCISES, MAX_EXERCISES = 3, 8
+MIN_SETS, MAX_SETS = 2, 5
+PREFERRED_SETS = 4
+
+@lru_cache(maxsize=None)
+def solve_session_shape(duration_min: int, difficulty: str) -> Tuple[int, int]:
+    """Return (exercise count, total working sets) that best fills ``duration_min``.
+
+    Closed form: the working budget divided by minutes-per-set gives the set
+    count, clamped to what MIN/MAX_EXERCISES x MIN/MAX_SETS can hold, and the
+    exercise count is the fewest exercises that keep each near PREFERRED_SETS.
+    The estimate lands within half a set of the target whenever it is feasible.
+    Results depend only on (duration, difficulty), so they are cached and shared
+    by every day, week and client with the same settings.
+    """
+    warm, cool = warmup_cooldown_minutes(difficulty)
+    per_set = estimate_set_minutes(difficulty)
+    budget = max(duration_min - (warm + cool), 0)
+    total_sets = min(max(round(budget / per_set), MIN_EXERCISES * MIN_SETS), MAX_EXERCISES * MAX_SETS)
+    n_ex = min(max(-(-total_sets // PREFERRED_SETS), MIN_EXERCISES), MAX_EXERCISES)
+    # Too few sets to give every exercise the minimum: drop exercises instead
+    n_ex = min(n_ex, max(total_sets // MIN_SETS, MIN_EXERCISES))
+    return n_ex, total_sets
+
+def distribute_sets(total_sets: int, n_ex: int) -> List[int]:
+    # Even split, remainder to the first exercises, clamped to MIN/MAX_SETS
+    if n_ex <= 0:
+        return []
+    base, extra = divmod(total_sets, n_ex)
+    return [min(max(base + (1 if i < extra else 0), MIN_SETS), MAX_SETS) for i in range(n_ex)]
+
+def fit_sessions(requests: List[Tuple[int, str]]) -> List[Tuple[int, List[int], float]]:
+    """Batch form: for each (duration, difficulty) return (exercise count, sets, estimated minutes)."""
+    out = []
+    for duration_min, difficulty in requests:
+        n_ex, total_sets = solve_session_shape(duration_min, difficulty)
+        sets = distribute_sets(total_sets, n_ex)
+        warm, cool = warmup_cooldown_minutes(difficulty)
+        out.append((n_ex, sets, warm + cool + sum(sets) * estimate_set_minutes(difficulty)))
+    return out
+
+# -----------------------
+# 🗂️ Plan Representation
+# -----------------------
+class PlanItem:
+    """One exercise slot of a DayPlan, materialized on demand for display."""
+    __slots__ = ("exercise", "sets", "reps", "est_min")
+
+    def __init__(self, exercise: Exercise, sets: int, reps: int, est_min: float):
+        self.exercise = exercise
+        self.sets = sets
+        self.reps = reps
+        self.est_min = est_min
+
+class DayPlan:
+    """Compact day plan: exercises are catalog indexes, sets/reps are byte arrays.
+
+    ``items`` and ``steps`` are generated when read instead of being stored, so
+    a plan costs a few hundred bytes however many sessions keep one around.
+    """
+    __slots__ = ("targets", "difficulty", "duration", "warm", "cool", "estimated_total",
+                 "catalog", "exercise_idx", "sets", "reps")
+
+    def __init__(self, targets: List[str], difficulty: str, duration: int, warm: int, cool: int,
+                 estimated_total: int, catalog: "ExerciseCatalog", exercise_idx: List[int],
+                 sets: List[int], reps: List[int]):
+        self.targets = tuple(targets)
+        self.difficulty = difficulty
+        self.duration = duration
+        self.warm = warm
+        self.cool = cool
+        self.estimated_total = estimated_total
+        self.catalog = catalog
+        self.exercise_idx = array("I", exercise_idx)
+        self.sets = array("B", sets)
+        self.reps = array("B", reps)
+
+    def __reduce__(self):
+        # Ship the catalog by version rather than pickling every exercise with each plan
+        return (_restore_day_plan, (self.catalog.version, self.targets, self.difficulty, self.duration, self.warm,
+                                    self.cool, self.estimated_total, self.exercise_idx.tobytes(),
+                                    self.sets.tobytes(), self.reps.tobytes()))
+
+    @property
+    def exercises(self) -> List[Exercise]:
+        return [self.catalog.exercises[i] for i in self.exercise_idx]
+
+    @property
+    def items(self) -> List[PlanItem]:
+        per_set = estimate_set_minutes(self.difficulty)
+        return [PlanItem(ex, sets, reps, sets * per_set) for ex, sets, reps in zip(self.exercises, self.sets, self.reps)]
+
+    @property
+    def steps(self) -> List[str]:
+        target_list = ", ".join(self.targets)
+        rest_step = REST_STEPS.get(self.difficulty, REST_STEPS["Advanced"])
+        steps = [f"Stretch & Warm-up • {self.warm} min (dynamic warm-up for: {target_list})"]
+        for ex, sets, reps in zip(self.exercises, self.sets, self.reps):
+            steps.append(f"{sets} sets × {reps} reps • {ex.name} ({ex.muscle})")
+            steps.append(rest_step)
+        steps.append(f"Cool-down & Stretch • {self.cool} min (static stretching for: {target_list})")
+        return steps
+
+def _restore_day_plan(catalog_version: str, targets, difficulty, duration, warm, cool, estimated_total,
+                      exercise_idx: bytes, sets: bytes, reps: bytes) -> DayPlan:
+    idx = array("I")
+    idx.frombytes(exercise_idx)
+    return DayPlan(targets, difficulty, duration, warm, cool, estimated_total,
+                   catalog_for_version(catalog_version), idx, sets, reps)
+
+def build_day_plan(targets: List[str], difficulty: str, duration_min: int, avoid_tags: List[str],
+                   catalog: "ExerciseCatalog" = None, rng: Optional[random.Random] = None,
+                   pools: Optional[dict] = None, exclude: FrozenSet[int] = frozenset()) -> DayPlan:
+    catalog = catalog or CATALOG
+    rng = rng or random
+    # Exercise count and sets are solved up front to fit the target duration
+    warm, cool = warmup_cooldown_minutes(difficulty)
+    per_set = estimate_set_minutes(difficulty)  # minutes per set incl. rest
+    n_ex, total_sets = solve_session_shape(duration_min, difficulty)
+    exercise_idx = choose_exercise_indexes(targets, difficulty, avoid_tags, n_ex, catalog=catalog, rng=rng, pools=pools,
+                                           exclude=exclude)
+
+    # Small pools may return fewer exercises than asked; spread the sets over what we got
+    sets = distribute_sets(total_sets, len(exercise_idx))
+    reps = [rng.choice(REP_CHOICES) for _ in exercise_idx]
+    total_minutes = warm + cool + sum(sets) * per_set
+
+    return DayPlan(targets, difficulty, duration_min, warm, cool, round(total_minutes),
+                   catalog, exercise_idx, sets, reps)
+
+def plan_week(start_date: datetime, selected_days: List[str], targets_by_day: Dict[str, List[str]], difficulty: str, daily_duration: int, avoid_tags: List[str],
+              seed: Optional[int] = None, catalog: "ExerciseCatalog" = None, rng: Optional[random.Random] = None,
+              pools: Optional[dict] = None):
+    # An explicit seed makes the week reproducible; otherwise fall back to the global RNG
+    if rng is None and seed is not None:
+        rng = random.Random(seed)
+    week = {}
+    for day in WEEK_DAYS:
+        if day in selected_days:
+            targets = day_targets(day, targets_by_day)
+            week[day] = build_day_plan(targets, difficulty, daily_duration, avoid_tags, catalog=catalog, rng=rng, pools=pools)
+        else:
+            week[day] = None
+    return week
+
+def day_targets(day: str, targets_by_day: Dict[str, List[str]]) -> List[str]:
+    return list(targets_by_day.get(day) or ["Cardio"])  # default if none chosen
+
+# -----------------------
+# 🧠 Plan Memoization
+# -----------------------
+class PlanCache:
+    """Bounded LRU of seeded week plans with time-based expiry.
+
+    Only seeded requests are cacheable. Returned plans are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(selected_days: List[str], targets_by_day: Dict[str, List[str]], difficulty: str,
+            daily_duration: int, avoid_tags: List[str], seed: int, catalog_version: str) -> tuple:
+        # Only the planned days' targets influence the result
+        targets = tuple((day, tuple(targets_by_day.get(day, []))) for day in sorted(selected_days))
+        return (targets, difficulty, daily_duration, tuple(sorted(set(avoid_tags))), seed, catalog_version)
+
+    def get(self, key: tuple) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, week: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), week)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "max_entries": self.max_entries}
+
+PLAN_CACHE = PlanCache()
+
+def get_plan_cache() -> PlanCache:
+    return PLAN_CACHE
+
+def plan_week_cached(start_date: datetime, selected_days: List[str], targets_by_day: Dict[str, List[str]], difficulty: str,
+                     daily_duration: int, avoid_tags: List[str], seed: int, catalog: "ExerciseCatalog" = None,
+                     cache: Optional[PlanCache] = None) -> dict:
+    catalog = catalog or CATALOG
+    cache = cache or get_plan_cache()
+    key = PlanCache.key(selected_days, targets_by_day, difficulty, daily_duration, avoid_tags, seed, catalog.version)
+    week = cache.get(key)
+    if week is None:
+        week = plan_week(start_date, selected_days, targets_by_day, difficulty, daily_duration, avoid_tags, seed=seed, catalog=catalog)
+        cache.put(key, week)
+    return week
+
+# -----------------------
+# 🔁 Incremental Replanning
+# -----------------------
+@dataclass(frozen=True)
+class WeekInputs:
+    """Hashable snapshot of everything plan_week depends on, for diffing."""
+    selected_days: FrozenSet[str]
+    targets_by_day: Tuple[Tuple[str, Tuple[str, ...]], ...]  # planned days only
+    difficulty: str
+    duration: int
+    avoid_tags: FrozenSet[str]
+    catalog_version: str
+
+    @classmethod
+    def from_args(cls, selected_days: List[str], targets_by_day: Dict[str, List[str]], difficulty: str,
+                  daily_duration: int, avoid_tags: List[str], catalog: "ExerciseCatalog" = None) -> "WeekInputs":
+        catalog = catalog or CATALOG
+        days = frozenset(d for d in selected_days if d in WEEK_DAYS)
+        targets = tuple((d, tuple(day_targets(d, targets_by_day))) for d in WEEK_DAYS if d in days)
+        return cls(days, targets, difficulty, daily_duration, frozenset(avoid_tags), catalog.version)
+
+    def targets_for(self, day: str) -> Optional[Tuple[str, ...]]:
+        return dict(self.targets_by_day).get(day)
+
+def changed_days(old: Optional[WeekInputs], new: WeekInputs) -> List[str]:
+    """Days whose plan must be rebuilt to go from ``old`` inputs to ``new``."""
+    if old is None or (old.difficulty, old.duration, old.avoid_tags, old.catalog_version) != \
+            (new.difficulty, new.duration, new.avoid_tags, new.catalog_version):
+        return list(WEEK_DAYS)  # session-wide settings touch every day
+    return [d for d in WEEK_DAYS if old.targets_for(d) != new.targets_for(d)]
+
+def replan_week(previous_week: Optional[dict], previous_inputs: Optional[WeekInputs], inputs: WeekInputs,
+                seed: int, catalog: "ExerciseCatalog" = None) -> Tuple[dict, List[str]]:
+    """Rebuild only the days whose inputs changed; returns (week, rebuilt days).
+
+    Each rebuilt day gets its own RNG from ``derive_seed(seed, weekday)`` so
+    its plan doesn't depend on which other days were rebuilt alongside it.
+    """
+    catalog = catalog or CATALOG
+    if previous_week is None:
+        previous_inputs = None
+    rebuilt = changed_days(previous_inputs, inputs)
+    week = {}
+    for i, day in enumerate(WEEK_DAYS):
+        if day not in rebuilt:
+            week[day] = previous_week.get(day)
+            continue
+        targets = inputs.targets_for(day)
+        if targets is None:
+            week[day] = None
+        else:
+            week[day] = build_day_plan(list(targets), inputs.difficulty, inputs.duration, sorted(inputs.avoid_tags),
+                                       catalog=catalog, rng=random.Random(derive_seed(seed, i)))
+    return week, rebuilt
+
+# -----------------------
+# 🩹 Injury Matching
+# -----------------------
+def normalize_injury_text(txt: str) -> str:
+    # Lowercase and fold hyphens/underscores/runs of whitespace to single spaces
+    return _SEPARATORS.sub(" ", (txt or "").lower()).strip()
+
+_SEPARATORS = re.compile(r"[\s\-_]+")
+
+_WORD_BOUNDARY = re.compile(r"\b")
+
+class InjuryMatcher:
+    """One compiled whole-word regex over every injury keyword and synonym.
+
+    A phrase also carries the tags of any shorter keyword it contains as whole
+    words ("lower back" implies "back"), since the regex consumes the longest match.
+    The pattern is built on first use, so loading a catalog costs nothing until
+    injury text is actually parsed.
+    """
+
+    def __init__(self, injury_tags: Dict[str, List[str]], synonyms: Dict[str, str]):
+        self._injury_tags = injury_tags
+        self._synonyms = synonyms
+        self._pattern: Optional["re.Pattern"] = None
+        self._tags_by_phrase: Dict[str, FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+        self.match = lru_cache(maxsize=4096)(self._match)
+
+    def _build(self) -> None:
+        with self._lock:
+            if self._pattern is not None:
+                return
+            base: Dict[str, set] = {normalize_injury_text(k): set(v) for k, v in self._injury_tags.items()}
+            for phrase, key in self._synonyms.items():
+                base.setdefault(normalize_injury_text(phrase), set()).update(self._injury_tags.get(key, ()))
+            # Whole-word sub-phrases start and end on word boundaries, so look those spans up
+            # directly instead of searching every phrase for every other phrase
+            tags_by_phrase = {}
+            for phrase, tags in base.items():
+                tags = set(tags)
+                bounds = [m.start() for m in _WORD_BOUNDARY.finditer(phrase)]
+                for i, start in enumerate(bounds):
+                    for end in bounds[i + 1:]:
+                        other = base.get(phrase[start:end])
+                        if other is not None:
+                            tags |= other
+                tags_by_phrase[phrase] = frozenset(tags)
+            self._tags_by_phrase = tags_by_phrase
+            # Longest first so multi-word phrases win over their parts
+            alternation = "|".join(re.escape(p) for p in sorted(base, key=len, reverse=True))
+            self._pattern = re.compile(rf"\b({alternation})s?\b")
+
+    @property
+    def pattern(self) -> "re.Pattern":
+        if self._pattern is None:
+            self._build()
+        return self._pattern
+
+    @property
+    def tags_by_phrase(self) -> Dict[str, FrozenSet[str]]:
+        if self._pattern is None:
+            self._build()
+        return self._tags_by_phrase
+
+    def _match(self, normalized: str) -> FrozenSet[str]:
+        avoid: set = set()
+        pattern, tags_by_phrase = self.pattern, self.tags_by_phrase
+        for m in pattern.finditer(normalized):
+            avoid |= tags_by_phrase[m.group(1)]
+        return frozenset(avoid)
+
+    def tags(self, txt: str) -> FrozenSet[str]:
+        return self.match(normalize_injury_text(txt))
+
+INJURY_MATCHER = InjuryMatcher(INJURY_TAGS, INJURY_SYNONYMS)
+
+def tags_from_injury_text(txt: str, matcher: Optional[InjuryMatcher] = None) -> List[str]:
+    return sorted((matcher or INJURY_MATCHER).tags(txt))
+
+def render_plan_text(week, show_details: bool = False) -> str:
+    out = []
+    for day, plan in week.items():
+        out.append(f"=== {day} ===")
+        if plan is None:
+            out.append("Rest Day")
+        else:
+            out.append(f"Difficulty: {plan.difficulty} • Target Duration: {plan.duration} min • Estimated: {plan.estimated_total} min")
+            out.append(f"Targets: {', '.join(plan.targets)}")
+            if show_details:
+                for step in plan.steps:
+                    out.append(f"- {step}")
+            else:
+                # summary
+                for item in plan.items:
+                    ex = item.exercise
+                    out.append(f"- {ex.name} ({ex.muscle}): {item.sets} × {item.reps}")
+        out.append("")
+    return "\n".join(out).strip()
+
+def week_to_dict(week: dict) -> dict:
+    # JSON-friendly copy of a week plan (exercises by name/muscle instead of objects)
+    out = {}
+    for day, plan in week.items():
+        if plan is None:
+            out[day] = None
+            continue
+        out[day] = {
+            "targets": list(plan.targets),
+            "difficulty": plan.difficulty,
+            "duration": plan.duration,
+            "warm": plan.warm,
+            "cool": plan.cool,
+            "estimated_total": plan.estimated_total,
+            "items": [{"exercise": item.exercise.name, "muscle": item.exercise.muscle,
+                       "sets": item.sets, "reps": item.reps} for item in plan.items],
+        }
+    return out
+
+def cache_counters() -> Dict[str, int]:
+    # Flat hit/miss counters of every process-wide cache, for per-rerun deltas
+    png, plans, injury = PNG_CACHE.stats(), PLAN_CACHE.stats(), INJURY_MATCHER.match.cache_info()
+    return {
+        "png_hits": png["hits"], "png_misses": png["misses"],
+        "plan_hits": plans["hits"], "plan_misses": plans["misses"],
+        "injury_hits": injury.hits, "injury_misses": injury.misses,
+    }
+
+# -----------------------
+# 📦 Batch Planning
+# -----------------------
+@dataclass
+class ClientProfile:
+    days: List[str]
+    targets_by_day: Dict[str, List[str]]
+    difficulty: str = "Intermediate"
+    duration: int = 75
+    injury_text: str = ""
+    seed: Optional[int] = None  # overrides the batch-derived seed
+    client_id: str = ""          # used to name exported files
+
+def derive_seed(base_seed: int, index: int) -> int:
+    # splitmix64 step: stable per-client seeds independent of batch order or chunking
+    z = (base_seed * 0x9E3779B97F4A7C15 + (index + 1) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return (z ^ (z >> 31)) & 0x7FFFFFFF
+
+def plan_weeks_batch(profiles: List[ClientProfile], seed: int = 0, start_date: Optional[datetime] = None,
+                     catalog: "ExerciseCatalog" = None, start_index: int = 0) -> List[dict]:
+    """Plan a week for every profile, sharing parsed injury tags and candidate pools.
+
+    Client ``i`` is planned with ``derive_seed(seed, start_index + i)`` unless its
+    profile carries its own seed, so results don't depend on how a roster is split.
+    """
+    catalog = catalog or CATALOG
+    pools: dict = {}
+    injury_tags: Dict[str, List[str]] = {}
+    weeks = []
+    for i, profile in enumerate(profiles):
+        avoid = injury_tags.get(profile.injury_text)
+        if avoid is None:
+            avoid = injury_tags[profile.injury_text] = tags_from_injury_text(profile.injury_text)
+        client_seed = profile.seed if profile.seed is not None else derive_seed(seed, start_index + i)
+        weeks.append(plan_week(start_date, profile.days, profile.targets_by_day, profile.difficulty, profile.duration,
+                               avoid, seed=client_seed, catalog=catalog, pools=pools))
+    return weeks
+
+# -----------------------
+# 🖼️ Image Export
+# -----------------------
+# Font settings used by plan_to_png (face, size); part of the render cache key
+PNG_BODY_FONT = ("DejaVuSans.ttf", 20)
+PNG_TITLE_FONT = ("DejaVuSans-Bold.ttf", 26)
+
+# Where to look when Pillow can't resolve a face by bare file name
+FONT_SEARCH_DIRS = [
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/dejavu",
+    "/usr/local/share/fonts",
+    "/Library/Fonts",
+    "C:/Windows/Fonts",
+]
+
+class FontRegistry:
+    """Loads each (face, size) once per process and remembers how it was resolved."""
+
+    def __init__(self, search_dirs: List[str] = FONT_SEARCH_DIRS):
+        self.search_dirs = list(search_dirs)
+        self._fonts: Dict[Tuple[str, int], object] = {}
+        self._sources: Dict[Tuple[str, int], str] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, face: str, size: int):
+        from PIL import ImageFont
+        for candidate in [face] + [f"{d}/{face}" for d in self.search_dirs]:
+            try:
+                return ImageFont.truetype(candidate, size), candidate
+            except OSError:
+                continue
+        # Bitmap fallback; newer Pillow can scale the default font
+        try:
+            return ImageFont.load_default(size=size), "default (scaled)"
+        except TypeError:
+            return ImageFont.load_default(), "default (bitmap)"
+
+    def get(self, face: str, size: int):
+        key = (face, size)
+        font = self._fonts.get(key)
+        if font is not None:
+            return font
+        with self._lock:
+            # Another session may have loaded it while we waited
+            if key not in self._fonts:
+                self._fonts[key], self._sources[key] = self._load(face, size)
+            return self._fonts[key]
+
+    def sources(self) -> Dict[str, str]:
+        with self._lock:
+            return {f"{face}@{size}": src for (face, size), src in self._sources.items()}
+
+FONT_REGISTRY = FontRegistry()
+
+def get_font_registry() -> FontRegistry:
+    return FONT_REGISTRY
+
+# Canvas layout shared by every format
+IMAGE_WIDTH = 1100
+IMAGE_PADDING = 40
+IMAGE_LINE_HEIGHT = 28
+IMAGE_LINE_WIDTH = 70  # characters before wrapping
+IMAGE_BACKGROUND = (18, 24, 38)
+IMAGE_FOREGROUND = (240, 240, 255)
+# Body text is drawn slightly dimmer than the title (grey level on the palette ramp)
+BODY_LEVEL = 232
+
+IMAGE_FORMATS = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+# Encoder settings per speed/size trade-off, measured on a 7-day detailed plan (encode only;
+# drawing the text costs ~150 ms on top for every raster format):
+#   PNG  fast 32 ms/143 KiB • balanced 54 ms/113 KiB • small 335 ms/112 KiB
+#   WebP fast 83 ms/43 KiB  • balanced 239 ms/22 KiB • small 289 ms/21 KiB
+# WebP is lossless ("quality" is its effort knob); on text lossy WebP is both slower and larger.
+# Methods above 4 cost seconds for no gain, and method 6 at quality 100 takes ~15 s per image.
+IMAGE_SPEED_PRESETS = {
+    "fast": {"png": {"compress_level": 1}, "webp": {"lossless": True, "method": 0, "quality": 100}},
+    "balanced": {"png": {"compress_level": 6}, "webp": {"lossless": True, "method": 1, "quality": 100}},
+    "small": {"png": {"compress_level": 9}, "webp": {"lossless": True, "method": 2, "quality": 100}},
+}
+
+def wrap_plan_lines(text: str, line_width: int = IMAGE_LINE_WIDTH) -> List[str]:
+    wrapped = []
+    for line in text.split("\n"):
+        if len(line) > line_width:
+            wrapped.extend(textwrap.wrap(line, width=line_width))
+        else:
+            wrapped.append(line)
+    return wrapped
+
+def paginate_lines(lines: List[str], max_height: Optional[int]) -> List[List[str]]:
+    # Split into pages whose canvas stays under max_height (None = one tall page)
+    if not max_height:
+        return [lines]
+    per_page = max(1, (max_height - IMAGE_PADDING * 2) // IMAGE_LINE_HEIGHT - 2)
+    return [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+
+def _palette_ramp(levels: int = 16) -> List[int]:
+    # Background -> foreground in `levels` steps; antialiased edges land on the in-between entries
+    ramp = []
+    for i in range(levels):
+        t = i / (levels - 1)
+        ramp.extend(round(bg + (fg - bg) * t) for bg, fg in zip(IMAGE_BACKGROUND, IMAGE_FOREGROUND))
+    return ramp
+
+_RAMP_LEVELS = 16
+_RAMP_LUT = [v * (_RAMP_LEVELS - 1) // 255 for v in range(256)]
+
+def _render_raster_page(lines: List[str], title: str):
+    from PIL import Image, ImageDraw
+    # Fonts come from the process-wide registry (loaded once per face/size)
+    fonts = get_font_registry()
+    font = fonts.get(*PNG_BODY_FONT)
+    title_font = fonts.get(*PNG_TITLE_FONT)
+
+    # Two-colour text only needs intensity: draw in greyscale, then map onto a 16-entry palette
+    height = IMAGE_PADDING * 2 + IMAGE_LINE_HEIGHT * (len(lines) + 2)
+    img = Image.new("L", (IMAGE_WIDTH, height), color=0)
+    draw = ImageDraw.Draw(img)
+    draw.text((IMAGE_PADDING, IMAGE_PADDING - 10), f"💪 {title}", font=title_font, fill=255)
+    y = IMAGE_PADDING + 28
+    for line in lines:
+        if line:
+            draw.text((IMAGE_PADDING, y), line, font=font, fill=BODY_LEVEL)
+        y += IMAGE_LINE_HEIGHT
+    img = img.point(_RAMP_LUT)
+    img.putpalette(_palette_ramp(_RAMP_LEVELS))  # L -> P; PNG then stores 4 bits per pixel
+    return img
+
+def _render_svg_page(lines: List[str], title: str) -> bytes:
+    from html import escape  # imported here to keep it off the core import path
+    height = IMAGE_PADDING * 2 + IMAGE_LINE_HEIGHT * (len(lines) + 2)
+    bg, fg = "rgb(%d,%d,%d)" % IMAGE_BACKGROUND, "rgb(%d,%d,%d)" % IMAGE_FOREGROUND
+    body = "rgb(%d,%d,%d)" % tuple(_palette_ramp(_RAMP_LEVELS)[3 * _RAMP_LUT[BODY_LEVEL]:3 * _RAMP_LUT[BODY_LEVEL] + 3])
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{IMAGE_WIDTH}" height="{height}" viewBox="0 0 {IMAGE_WIDTH} {height}">',
+        f'<rect width="100%" height="100%" fill="{bg}"/>',
+        '<g font-family="DejaVu Sans, Verdana, sans-serif" xml:space="preserve">',
+        # SVG positions text by baseline, Pillow by top edge: shift by roughly the ascent
+        f'<text x="{IMAGE_PADDING}" y="{IMAGE_PADDING + 14}" font-size="26" font-weight="bold" fill="{fg}">💪 {escape(title, quote=False)}</text>',
+    ]
+    y = IMAGE_PADDING + 28 + 20
+    for line in lines:
+        if line:
+            out.append(f'<text x="{IMAGE_PADDING}" y="{y}" font-size="20" fill="{body}">{escape(line, quote=False)}</text>')
+        y += IMAGE_LINE_HEIGHT
+    out.append("</g></svg>")
+    return "\n".join(out).encode("utf-8")
+
+def render_plan_images(text: str, title: str = "Workout Plan", fmt: str = "png", speed: str = "balanced",
+                       max_height: Optional[int] = None) -> List[bytes]:
+    """Render plan text as one image per page.
+
+    ``fmt`` is one of IMAGE_FORMATS and ``speed`` one of IMAGE_SPEED_PRESETS.
+    With ``max_height`` long plans are split into pages titled "(i/n)" instead
+    of one ever-taller canvas.
+    """
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format {fmt!r}; expected one of {', '.join(IMAGE_FORMATS)}")
+    if speed not in IMAGE_SPEED_PRESETS:
+        raise ValueError(f"Unknown speed preset {speed!r}; expected one of {', '.join(IMAGE_SPEED_PRESETS)}")
+    pages = paginate_lines(wrap_plan_lines(text), max_height)
+    out = []
+    for i, lines in enumerate(pages, start=1):
+        page_title = title if len(pages) == 1 else f"{title} ({i}/{len(pages)})"
+        if fmt == "svg":
+            out.append(_render_svg_page(lines, page_title))
+            continue
+        img = _render_raster_page(lines, page_title)
+        buf = io.BytesIO()
+        if fmt == "webp":
+            from PIL import features
+            if not features.check("webp"):
+                raise ValueError("This Pillow build has no WebP support")
+            img.convert("RGB").save(buf, format="WEBP", **IMAGE_SPEED_PRESETS[speed]["webp"])
+        else:
+            img.save(buf, format="PNG", **IMAGE_SPEED_PRESETS[speed]["png"])
+        out.append(buf.getvalue())
+    return out
+
+def plan_to_png(text: str, title: str = "Workout Plan") -> bytes:
+    # Render a simple image from text for easy saving/sharing
+    return render_plan_images(text, title=title, fmt="png", speed="balanced")[0]
+
+# -----------------------
+# 🗃️ PNG Render Cache
+# -----------------------
+class PNGRenderCache:
+    """Bounded LRU cache of rendered plan images, keyed on (text, title, font and encoder settings)."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, title: str, *settings) -> str:
+        raw = repr((text, title, PNG_BODY_FONT, PNG_TITLE_FONT) + settings)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_or_render_pages(self, text: str, title: str = "Workout Plan", fmt: str = "png",
+                            speed: str = "balanced", max_height: Optional[int] = None) -> Tuple[bytes, ...]:
+        k = self.key(text, title, fmt, speed, max_height)
+        with self._lock:
+            pages = self._entries.get(k)
+            if pages is not None:
+                self._entries.move_to_end(k)
+                self.hits += 1
+                return pages
+            self.misses += 1
+        # Render outside the lock so concurrent sessions don't serialize on Pillow
+        pages = tuple(render_plan_images(text, title=title, fmt=fmt, speed=speed, max_height=max_height))
+        with self._lock:
+            self._entries[k] = pages
+            self._entries.move_to_end(k)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pages
+
+    def get_or_render(self, text: str, title: str = "Workout Plan", fmt: str = "png", speed: str = "balanced") -> bytes:
+        # Single-image form used by the app's download buttons
+        return self.get_or_render_pages(text, title=title, fmt=fmt, speed=speed)[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "max_entries": self.max_entries}
+
+# One cache per process, shared by every session and surviving Streamlit reruns
+PNG_CACHE = PNGRenderCache()
+
+def get_png_cache() -> PNGRenderCache:
+    return PNG_CACHE
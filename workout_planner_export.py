@@ -0,0 +1,222 @@
+"""Bulk export of week plans (text + PNG/WebP/SVG images) for whole client rosters.
+
+Serial and process-pool modes produce identical results: every client's seed
+is derived from the batch seed and the client's position in the roster.
+Rosters are read and planned in chunks, and writers consume the item stream
+one plan at a time, so with an NDJSON roster peak memory does not grow with
+roster size (beyond the ZIP's own per-entry directory). A JSON-list roster
+has to be parsed whole; only the profiles are held, never the plans or images.
+
+    python workout_planner_export.py roster.json plans.zip --format png --workers 4
+    python workout_planner_export.py roster.json plans.zip --format webp --speed small --max-height 1600
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+from collections import deque
+from itertools import islice
+import argparse
+import base64
+import json
+import os
+import re
+import zipfile
+
+from workout_planner_core import (
+    ClientProfile, plan_weeks_batch, render_plan_text, render_plan_images, week_to_dict,
+    IMAGE_FORMATS, IMAGE_SPEED_PRESETS,
+)
+from workout_planner_catalog import get_catalog_bundle
+
+@dataclass(frozen=True)
+class ImageOptions:
+    fmt: str = "png"          # key of IMAGE_FORMATS
+    speed: str = "balanced"   # key of IMAGE_SPEED_PRESETS
+    max_height: Optional[int] = None  # split long plans into pages no taller than this
+
+@dataclass
+class ExportItem:
+    index: int
+    client_id: str
+    text: str
+    images: Tuple[bytes, ...] = ()  # one entry per page
+    week: Optional[dict] = None  # only kept when include_week=True (it dominates IPC size)
+
+def _export_chunk(start_index: int, profiles: List[ClientProfile], seed: int, image: Optional[ImageOptions],
+                  show_details: bool, include_week: bool, catalog_path: Optional[str] = None) -> List[ExportItem]:
+    # Runs in a worker process; must stay a module-level function so it pickles.
+    # Workers load the catalog by path (through its compiled cache) instead of receiving it.
+    catalog = get_catalog_bundle(catalog_path).catalog
+    weeks = plan_weeks_batch(profiles, seed=seed, start_index=start_index, catalog=catalog)
+    items = []
+    for offset, (profile, week) in enumerate(zip(profiles, weeks)):
+        text = render_plan_text(week, show_details=show_details)
+        images = ()
+        if image is not None:
+            images = tuple(render_plan_images(text, title="Weekly Workout Plan", fmt=image.fmt,
+                                              speed=image.speed, max_height=image.max_height))
+        index = start_index + offset
+        items.append(ExportItem(index, profile.client_id or f"client_{index:06d}", text, images,
+                                week if include_week else None))
+    return items
+
+def _roster_chunks(profiles: Iterable[ClientProfile], chunk_size: int) -> Iterator[Tuple[int, List[ClientProfile]]]:
+    # (start index, profiles) pairs; pulls at most one chunk from ``profiles`` at a time
+    it = iter(profiles)
+    start = 0
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+def export_serial(profiles: Iterable[ClientProfile], seed: int = 0, image: Optional[ImageOptions] = ImageOptions(),
+                  show_details: bool = False, chunk_size: int = 64, include_week: bool = False,
+                  catalog_path: Optional[str] = None) -> Iterator[ExportItem]:
+    for start, chunk in _roster_chunks(profiles, chunk_size):
+        yield from _export_chunk(start, chunk, seed, image, show_details, include_week, catalog_path)
+
+def export_parallel(profiles: Iterable[ClientProfile], seed: int = 0, workers: Optional[int] = None,
+                    chunk_size: int = 64, image: Optional[ImageOptions] = ImageOptions(), show_details: bool = False,
+                    include_week: bool = False, catalog_path: Optional[str] = None) -> Iterator[ExportItem]:
+    """Yield ExportItems in roster order, computed on a pool of ``workers`` processes.
+
+    Work is submitted in chunks of ``chunk_size`` clients to amortize IPC, and at
+    most ``2 * workers`` chunks are in flight so results stream instead of piling
+    up in memory. ``profiles`` may be any iterable (e.g. iter_roster) and is only
+    read as chunks are submitted. ``image=None`` skips rendering entirely.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        yield from export_serial(profiles, seed, image, show_details, chunk_size, include_week, catalog_path)
+        return
+    # Returned plans reference the catalog by version, so it must be loaded here too
+    get_catalog_bundle(catalog_path)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(start: int, chunk: List[ClientProfile]):
+            return pool.submit(_export_chunk, start, chunk, seed, image, show_details, include_week, catalog_path)
+
+        pending = deque()
+        chunks = _roster_chunks(profiles, chunk_size)
+        for start, chunk in chunks:
+            pending.append(submit(start, chunk))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            items = pending.popleft().result()
+            # Keep the window full before handing results to the caller
+            nxt = next(chunks, None)
+            if nxt is not None:
+                pending.append(submit(*nxt))
+            yield from items
+
+# -----------------------
+# 💾 Streaming Writers
+# -----------------------
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+MAX_ENTRY_STEM = 100
+
+def zip_entry_stem(client_id: str, index: int, used: set) -> str:
+    """A flat, unique file stem for a client: no directories, no leading dots, no repeats."""
+    stem = _UNSAFE_NAME.sub("_", client_id).lstrip(".")[:MAX_ENTRY_STEM] or f"client_{index:06d}"
+    candidate, n = stem, 0
+    while candidate in used:
+        n += 1
+        candidate = f"{stem}_{index:06d}" if n == 1 else f"{stem}_{index:06d}_{n}"
+    used.add(candidate)
+    return candidate
+
+def write_zip(items: Iterable[ExportItem], path: str, fmt: str = "png") -> int:
+    """Write each item into a ZIP as it arrives; returns the number of plans written.
+
+    Entries are named after client ids, sanitized to flat file names; a repeated
+    id gets its roster index appended. Multi-page images are stored as
+    ``<client>_p1.<fmt>``, ``<client>_p2.<fmt>``, ...
+    """
+    count = 0
+    used: set = set()
+    with zipfile.ZipFile(path, "w") as zf:
+        for item in items:
+            stem = zip_entry_stem(item.client_id, item.index, used)
+            if fmt == "text":
+                zf.writestr(f"{stem}.txt", item.text, compress_type=zipfile.ZIP_DEFLATED)
+            else:
+                # PNG/WebP are already compressed; storing avoids compressing them twice. SVG is plain text.
+                compress = zipfile.ZIP_DEFLATED if fmt == "svg" else zipfile.ZIP_STORED
+                pages = item.images
+                for page, data in enumerate(pages, start=1):
+                    name = f"{stem}.{fmt}" if len(pages) == 1 else f"{stem}_p{page}.{fmt}"
+                    zf.writestr(name, data, compress_type=compress)
+            count += 1
+    return count
+
+def write_ndjson(items: Iterable[ExportItem], path: str) -> int:
+    """Write one JSON object per line; images (if rendered) are base64-encoded pages."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as fh:
+        for item in items:
+            record = {"index": item.index, "client_id": item.client_id, "text": item.text}
+            if item.week is not None:
+                record["plan"] = week_to_dict(item.week)
+            if item.images:
+                record["images_base64"] = [base64.b64encode(page).decode("ascii") for page in item.images]
+            fh.write(json.dumps(record, ensure_ascii=False))
+            fh.write("\n")
+            count += 1
+    return count
+
+def export_roster(profiles: Iterable[ClientProfile], path: str, fmt: str = "png", seed: int = 0,
+                  workers: Optional[int] = 1, chunk_size: int = 64, show_details: bool = False,
+                  catalog_path: Optional[str] = None, speed: str = "balanced",
+                  max_height: Optional[int] = None) -> int:
+    """Plan, render and stream a roster to ``path``.
+
+    ``fmt`` is an image format (``"png"``, ``"webp"``, ``"svg"``) or ``"text"``
+    (ZIP of files per client) or ``"ndjson"`` (structured plan + text per line,
+    no images). ``speed`` and ``max_height`` only apply to image formats.
+    """
+    if fmt not in IMAGE_FORMATS and fmt not in ("text", "ndjson"):
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    image = ImageOptions(fmt, speed, max_height) if fmt in IMAGE_FORMATS else None
+    items = export_parallel(profiles, seed=seed, workers=workers, chunk_size=chunk_size,
+                            image=image, show_details=show_details,
+                            include_week=(fmt == "ndjson"), catalog_path=catalog_path)
+    if fmt == "ndjson":
+        return write_ndjson(items, path)
+    return write_zip(items, path, fmt=fmt)
+
+def iter_roster(path: str) -> Iterator[ClientProfile]:
+    # Accepts a JSON list (parsed whole) or NDJSON of ClientProfile fields (streamed line by line)
+    with open(path, encoding="utf-8") as fh:
+        if path.endswith(".ndjson") or path.endswith(".jsonl"):
+            for line in fh:
+                if line.strip():
+                    yield ClientProfile(**json.loads(line))
+        else:
+            for record in json.load(fh):
+                yield ClientProfile(**record)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export week plans for a client roster.")
+    parser.add_argument("roster", help="JSON list or NDJSON file of client profiles")
+    parser.add_argument("output", help="destination .zip or .ndjson file")
+    parser.add_argument("--format", choices=[*IMAGE_FORMATS, "text", "ndjson"], default="png")
+    parser.add_argument("--speed", choices=list(IMAGE_SPEED_PRESETS), default="balanced",
+                        help="image encoder trade-off: fast encode vs small files")
+    parser.add_argument("--max-height", type=int, help="split images into pages no taller than this (px)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--details", action="store_true", help="export full session steps")
+    parser.add_argument("--catalog", help="exercise catalog file (default: FORGE_CATALOG_PATH or built-in)")
+    args = parser.parse_args(argv)
+
+    n = export_roster(iter_roster(args.roster), args.output, fmt=args.format, seed=args.seed, workers=args.workers,
+                      chunk_size=args.chunk_size, show_details=args.details, catalog_path=args.catalog,
+                      speed=args.speed, max_height=args.max_height)
+    print(f"Exported {n} plans to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
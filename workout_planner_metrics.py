@@ -0,0 +1,115 @@
+"""Per-rerun stage timing and sampled profiling for the Streamlit app.
+
+Configured through environment variables so production stays opt-in:
+
+    FORGE_DEBUG=1                 show the debug panel (server-side only; it shows every session)
+    FORGE_METRICS_LOG=path.jsonl  append one JSON record per rerun
+    FORGE_PROFILE_FRACTION=0.05   cProfile the stages of this fraction of reruns
+    FORGE_PROFILE_DIR=profiles    where sampled .prof files are written
+
+No Streamlit dependency; the app owns one RerunMetrics per script run.
+"""
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, List, Optional
+import cProfile
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+
+DEBUG = os.environ.get("FORGE_DEBUG", "") not in ("", "0")
+METRICS_LOG = os.environ.get("FORGE_METRICS_LOG", "")
+PROFILE_FRACTION = float(os.environ.get("FORGE_PROFILE_FRACTION", "0") or 0)
+PROFILE_DIR = os.environ.get("FORGE_PROFILE_DIR", "profiles")
+
+# Recent reruns across all sessions in this process, for rolling percentiles
+HISTORY: Deque[dict] = deque(maxlen=500)
+_LOG_LOCK = threading.Lock()
+
+class RerunMetrics:
+    """Collects named stage timings and cache counter deltas for one script rerun."""
+
+    def __init__(self, counters: Optional[Callable[[], Dict[str, int]]] = None,
+                 profile_fraction: float = PROFILE_FRACTION, log_path: str = METRICS_LOG, scope: str = "app",
+                 session: str = ""):
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.scope = scope  # "app" for full reruns, "fragment:<name>" for partial ones
+        self.session = session  # optional caller-supplied label, e.g. a load-test session id
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.log_path = log_path
+        self._counters = counters
+        self._counters_start = counters() if counters else {}
+        self._t0 = time.perf_counter()
+        # Streamlit runs each script in its own thread, so thread CPU time is per-rerun
+        self._cpu0 = time.thread_time()
+        # The profiler only runs inside stage() blocks, whose finally turns it off again, so a rerun
+        # that raises or is interrupted before finish() can't leave it enabled on the thread
+        self.profiler: Optional[cProfile.Profile] = None
+        self._stage_depth = 0
+        if profile_fraction > 0 and random.random() < profile_fraction:
+            self.profiler = cProfile.Profile()
+
+    @contextmanager
+    def stage(self, name: str):
+        # Re-entering a stage accumulates, e.g. two PNG exports in one rerun
+        outermost = self._stage_depth == 0
+        self._stage_depth += 1
+        if outermost and self.profiler is not None:
+            self.profiler.enable()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += (time.perf_counter() - t0) * 1000
+            self._stage_depth -= 1
+            if outermost and self.profiler is not None:
+                self.profiler.disable()
+
+    def counter_deltas(self) -> Dict[str, int]:
+        if not self._counters:
+            return {}
+        now = self._counters()
+        return {k: v - self._counters_start.get(k, 0) for k, v in now.items()}
+
+    def finish(self) -> dict:
+        profile_path = None
+        if self.profiler is not None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profile_path = os.path.join(PROFILE_DIR, f"rerun_{self.rerun_id}.prof")
+            self.profiler.dump_stats(profile_path)
+        record = {
+            "ts": time.time(),
+            "rerun_id": self.rerun_id,
+            "scope": self.scope,
+            "session": self.session,
+            "total_ms": (time.perf_counter() - self._t0) * 1000,
+            "cpu_ms": (time.thread_time() - self._cpu0) * 1000,
+            "stages_ms": dict(self.stages),
+            "counters": self.counter_deltas(),
+            "profile": profile_path,
+        }
+        HISTORY.append(record)
+        if self.log_path:
+            with _LOG_LOCK, open(self.log_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(record) + "\n")
+        return record
+
+def stage_summary(history: Optional[List[dict]] = None) -> Dict[str, Dict[str, float]]:
+    """p50 / p95 / max per stage, and per rerun scope ("total" = full app reruns)."""
+    history = list(HISTORY) if history is None else history
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for record in history:
+        scope = record.get("scope", "app")
+        samples["total" if scope == "app" else scope].append(record["total_ms"])
+        for name, ms in record["stages_ms"].items():
+            samples[name].append(ms)
+    summary = {}
+    for name, values in samples.items():
+        values.sort()
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        summary[name] = {"n": len(values), "p50_ms": statistics.median(values), "p95_ms": p95, "max_ms": values[-1]}
+    return summary
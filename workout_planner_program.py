@@ -0,0 +1,225 @@
+"""Multi-week periodized programs (4–16 week blocks) built on build_day_plan.
+
+A program is split into blocks of ``deload_every`` weeks: build weeks add
+volume and the block's last week is a deload. Reps and sets are capped, so a
+build phase can progress for at most MAX_BUILD_WEEKS weeks; longer blocks, or
+``deload_every=0`` on a longer program, are rejected instead of silently
+repeating a saturated week. Exercises rotate every
+``rotate_every`` blocks, preferring movements the previous rotation didn't
+use. Within one rotation every week reuses the same selected exercises and
+only rewrites sets and reps, so selection runs once per rotation, not once
+per week. Candidate pools are shared across the whole roster.
+
+Weeks are built on first access: the first week of a 16-week program costs
+about one plan_week call.
+
+    python workout_planner_program.py --weeks 12 --days Monday Wednesday Friday --targets Chest Back Quads
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+import argparse
+import random
+
+from workout_planner_core import (
+    CATALOG, DIFFICULTIES, WEEK_DAYS, MAX_SETS, REP_CHOICES,
+    ClientProfile, DayPlan, ExerciseCatalog,
+    build_day_plan, day_targets, derive_seed, estimate_set_minutes, render_plan_text, tags_from_injury_text,
+)
+
+MIN_PROGRAM_WEEKS, MAX_PROGRAM_WEEKS = 4, 16
+# Progressive overload: +1 rep per build week, and +1 set per exercise from the third build week on
+REP_STEP = 1
+MAX_PROGRESS_REPS = 15
+EXTRA_SET_FROM_STEP = 2
+# Build weeks in a row that still add reps to every exercise; past this the top rep choice sits at
+# MAX_PROGRESS_REPS and sets at MAX_SETS, so longer build phases would repeat the same week
+MAX_BUILD_WEEKS = (MAX_PROGRESS_REPS - max(REP_CHOICES)) // REP_STEP + 1
+# Deload weeks keep the exercises and reps but cut sets to roughly this fraction
+DELOAD_SET_FRACTION = 0.6
+
+@dataclass(frozen=True)
+class ProgramSpec:
+    selected_days: Tuple[str, ...]
+    targets_by_day: Tuple[Tuple[str, Tuple[str, ...]], ...]
+    difficulty: str = "Intermediate"
+    duration: int = 75
+    avoid_tags: FrozenSet[str] = frozenset()
+    weeks: int = 8
+    deload_every: int = 4   # block length incl. its deload week; 0 = one block, no deloads or rotation
+                            # (only for programs no longer than MAX_BUILD_WEEKS)
+    rotate_every: int = 1   # blocks per exercise rotation
+    seed: int = 0
+
+    def __post_init__(self):
+        if not MIN_PROGRAM_WEEKS <= self.weeks <= MAX_PROGRAM_WEEKS:
+            raise ValueError(f"Programs run {MIN_PROGRAM_WEEKS}-{MAX_PROGRAM_WEEKS} weeks, got {self.weeks}")
+        if self.deload_every == 1 or self.deload_every < 0:
+            raise ValueError("deload_every must be 0 (no deloads) or at least 2")
+        build_weeks = self.deload_every - 1 if self.deload_every else self.weeks
+        if build_weeks > MAX_BUILD_WEEKS:
+            raise ValueError(f"Progression saturates after {MAX_BUILD_WEEKS} build weeks: "
+                             + (f"deload_every must be at most {MAX_BUILD_WEEKS + 1}" if self.deload_every
+                                else f"deload_every=0 only supports programs of up to {MAX_BUILD_WEEKS} weeks"))
+        if self.rotate_every < 1:
+            raise ValueError("rotate_every must be at least 1")
+        if self.difficulty not in DIFFICULTIES:
+            raise ValueError(f"Unknown difficulty {self.difficulty!r}")
+
+    @classmethod
+    def from_args(cls, selected_days: List[str], targets_by_day: Dict[str, List[str]], difficulty: str,
+                  daily_duration: int, avoid_tags: List[str], weeks: int = 8, deload_every: int = 4,
+                  rotate_every: int = 1, seed: int = 0) -> "ProgramSpec":
+        days = tuple(d for d in WEEK_DAYS if d in selected_days)
+        targets = tuple((d, tuple(day_targets(d, targets_by_day))) for d in days)
+        return cls(days, targets, difficulty, daily_duration, frozenset(avoid_tags), weeks, deload_every,
+                   rotate_every, seed)
+
+    def schedule(self, week: int) -> Tuple[int, int, bool]:
+        """(block, step within block, is_deload) for a 0-based week index."""
+        if not self.deload_every:
+            return 0, week, False
+        block, step = divmod(week, self.deload_every)
+        return block, step, step == self.deload_every - 1
+
+@dataclass
+class ProgramWeek:
+    number: int   # 1-based
+    block: int    # 1-based
+    step: int     # build week within the block (0-based); meaningless for deloads
+    deload: bool
+    rotation: int
+    plan: dict    # same shape as plan_week output
+
+    @property
+    def label(self) -> str:
+        kind = "Deload" if self.deload else f"Build {self.step + 1}"
+        return f"Week {self.number} • Block {self.block} • {kind} • Rotation {self.rotation + 1}"
+
+@lru_cache(maxsize=None)
+def _progress_tables(step: int, deload: bool) -> Tuple[bytes, bytes]:
+    # Byte translation tables (old value -> new value) for sets and reps, shared by every day and client
+    if deload:
+        sets = [max(1, round(s * DELOAD_SET_FRACTION)) for s in range(256)]
+        reps = list(range(256))
+    else:
+        extra = 1 if step >= EXTRA_SET_FROM_STEP else 0
+        sets = [min(s + extra, MAX_SETS) if s else 0 for s in range(256)]
+        reps = [min(r + REP_STEP * step, MAX_PROGRESS_REPS) if r else 0 for r in range(256)]
+    return bytes(sets), bytes(reps)
+
+def progress_day(base: DayPlan, step: int, deload: bool) -> DayPlan:
+    """Rewrite a rotation's base day for one week; exercises are kept as-is."""
+    set_table, rep_table = _progress_tables(step, deload)
+    sets = base.sets.tobytes().translate(set_table)
+    reps = base.reps.tobytes().translate(rep_table)
+    total = base.warm + base.cool + sum(sets) * estimate_set_minutes(base.difficulty)
+    return DayPlan(base.targets, base.difficulty, base.duration, base.warm, base.cool, round(total),
+                   base.catalog, base.exercise_idx, sets, reps)
+
+class Program:
+    """Lazily generated periodized program; index or iterate to get ProgramWeeks."""
+
+    def __init__(self, spec: ProgramSpec, catalog: Optional[ExerciseCatalog] = None, pools: Optional[dict] = None):
+        self.spec = spec
+        self.catalog = catalog or CATALOG
+        self.pools = {} if pools is None else pools  # pass one dict to share pools across a roster
+        self._rotations: List[Dict[str, DayPlan]] = []
+        self._weeks: Dict[int, ProgramWeek] = {}
+
+    def __len__(self) -> int:
+        return self.spec.weeks
+
+    def _rotation(self, index: int) -> Dict[str, DayPlan]:
+        # Each rotation excludes the previous one's exercises per day, so rotations build in order
+        while len(self._rotations) <= index:
+            r = len(self._rotations)
+            previous = self._rotations[r - 1] if r else {}
+            rng = random.Random(derive_seed(self.spec.seed, r))
+            avoid = sorted(self.spec.avoid_tags)
+            base = {}
+            for day, targets in self.spec.targets_by_day:
+                prev = previous.get(day)
+                base[day] = build_day_plan(list(targets), self.spec.difficulty, self.spec.duration, avoid,
+                                           catalog=self.catalog, rng=rng, pools=self.pools,
+                                           exclude=frozenset(prev.exercise_idx) if prev is not None else frozenset())
+            self._rotations.append(base)
+        return self._rotations[index]
+
+    def __getitem__(self, week: int) -> ProgramWeek:
+        if week < 0:
+            week += len(self)
+        if not 0 <= week < len(self):
+            raise IndexError(week)
+        cached = self._weeks.get(week)
+        if cached is not None:
+            return cached
+        block, step, deload = self.spec.schedule(week)
+        rotation = block // self.spec.rotate_every
+        base = self._rotation(rotation)
+        plan = {day: progress_day(base[day], step, deload) if day in base else None for day in WEEK_DAYS}
+        result = self._weeks[week] = ProgramWeek(week + 1, block + 1, step, deload, rotation, plan)
+        return result
+
+    def __iter__(self) -> Iterator[ProgramWeek]:
+        for week in range(len(self)):
+            yield self[week]
+
+def iter_program_text(program: Program, show_details: bool = False) -> Iterator[str]:
+    # One chunk per week, so callers can show week 1 before later weeks exist
+    for week in program:
+        yield f"##### {week.label} #####\n\n" + render_plan_text(week.plan, show_details=show_details)
+
+def render_program_text(program: Program, show_details: bool = False) -> str:
+    return "\n".join(iter_program_text(program, show_details))
+
+def plan_programs_batch(profiles: List[ClientProfile], weeks: int = 8, seed: int = 0, deload_every: int = 4,
+                        rotate_every: int = 1, catalog: Optional[ExerciseCatalog] = None,
+                        start_index: int = 0) -> List[Program]:
+    """Lazy programs for a roster, sharing candidate pools and parsed injury tags.
+
+    Client ``i`` uses ``derive_seed(seed, start_index + i)`` unless its profile
+    sets a seed, as in plan_weeks_batch. Nothing is planned until a week is read.
+    """
+    catalog = catalog or CATALOG
+    pools: dict = {}
+    injury_tags: Dict[str, List[str]] = {}
+    programs = []
+    for i, profile in enumerate(profiles):
+        avoid = injury_tags.get(profile.injury_text)
+        if avoid is None:
+            avoid = injury_tags[profile.injury_text] = tags_from_injury_text(profile.injury_text)
+        client_seed = profile.seed if profile.seed is not None else derive_seed(seed, start_index + i)
+        spec = ProgramSpec.from_args(profile.days, profile.targets_by_day, profile.difficulty, profile.duration,
+                                     avoid, weeks=weeks, deload_every=deload_every, rotate_every=rotate_every,
+                                     seed=client_seed)
+        programs.append(Program(spec, catalog=catalog, pools=pools))
+    return programs
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Print a periodized multi-week program.")
+    parser.add_argument("--weeks", type=int, default=8)
+    parser.add_argument("--days", nargs="+", default=["Monday", "Wednesday", "Friday"], choices=WEEK_DAYS)
+    parser.add_argument("--targets", nargs="+", default=["Chest", "Back", "Quads"])
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="Intermediate")
+    parser.add_argument("--duration", type=int, default=75)
+    parser.add_argument("--injuries", default="")
+    parser.add_argument("--deload-every", type=int, default=4,
+                        help=f"block length incl. deload (2-{MAX_BUILD_WEEKS + 1}, or 0 for programs up to {MAX_BUILD_WEEKS} weeks)")
+    parser.add_argument("--rotate-every", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--details", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        spec = ProgramSpec.from_args(args.days, {d: args.targets for d in args.days}, args.difficulty, args.duration,
+                                     tags_from_injury_text(args.injuries), weeks=args.weeks,
+                                     deload_every=args.deload_every, rotate_every=args.rotate_every, seed=args.seed)
+    except ValueError as exc:
+        parser.error(str(exc))
+    for chunk in iter_program_text(Program(spec), show_details=args.details):
+        print(chunk)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
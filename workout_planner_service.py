@@ -0,0 +1,303 @@
+"""Headless HTTP service for week plans (standard library only).
+
+    python workout_planner_service.py --port 8765 --workers 8
+    curl -s localhost:8765/plan -d '{"days": ["Monday", "Thursday"], "targets_by_day": {"Monday": ["Chest"]}, "seed": 7}'
+
+Endpoints:
+    POST /plan    JSON body (ClientProfile fields + ``format``, ``details``, ``speed``);
+                  ``format`` is ``json`` (plan + text), ``text`` or an image format
+    GET  /health  liveness + catalog version
+    GET  /stats   request/coalescing counters and process-wide cache counters
+
+The event loop only parses requests and writes responses. Planning, text and
+image rendering run on an executor, and identical requests that arrive while
+one is being computed all await that single computation.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, FrozenSet, Optional, Tuple
+import argparse
+import asyncio
+import json
+import random
+
+from workout_planner_core import (
+    DIFFICULTIES,
+    WEEK_DAYS,
+    IMAGE_FORMATS,
+    IMAGE_SPEED_PRESETS,
+    plan_week,
+    plan_week_cached,
+    render_plan_text,
+    week_to_dict,
+    tags_from_injury_text,
+    get_png_cache,
+    cache_counters,
+)
+from workout_planner_catalog import get_catalog_bundle
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or REASONS.get(status, ""))
+        self.status = status
+
+# -----------------------
+# 📨 Plan Requests
+# -----------------------
+@dataclass(frozen=True)
+class PlanRequest:
+    days: Tuple[str, ...]
+    targets_by_day: Tuple[Tuple[str, Tuple[str, ...]], ...]
+    difficulty: str = "Intermediate"
+    duration: int = 75
+    injury_text: str = ""
+    seed: Optional[int] = None
+    week_start: Optional[str] = None  # ISO date; only echoed back, plans don't depend on it
+    format: str = "json"
+    details: bool = False
+    speed: str = "balanced"
+
+    @classmethod
+    def from_payload(cls, payload: dict, muscle_groups=None) -> "PlanRequest":
+        """Validate a decoded JSON body; raises ValueError with a client-facing message."""
+        if not isinstance(payload, dict):
+            raise ValueError("Body must be a JSON object")
+        unknown = set(payload) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        days = payload.get("days", [])
+        if not isinstance(days, list) or any(d not in WEEK_DAYS for d in days):
+            raise ValueError(f"days must be a list of {', '.join(WEEK_DAYS)}")
+        targets = payload.get("targets_by_day", {})
+        if not isinstance(targets, dict) or any(d not in WEEK_DAYS or not isinstance(m, list)
+                                                or not all(isinstance(x, str) for x in m) for d, m in targets.items()):
+            raise ValueError("targets_by_day must map week days to lists of muscle groups")
+        if muscle_groups is not None:
+            bad = sorted({m for muscles in targets.values() for m in muscles if m not in muscle_groups})
+            if bad:
+                raise ValueError(f"Unknown muscle groups: {', '.join(map(str, bad))}")
+        difficulty = payload.get("difficulty", "Intermediate")
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+        duration = payload.get("duration", 75)
+        if not isinstance(duration, int) or not 15 <= duration <= 240:
+            raise ValueError("duration must be an integer number of minutes (15-240)")
+        seed = payload.get("seed")
+        if seed is not None and not isinstance(seed, int):
+            raise ValueError("seed must be an integer")
+        week_start = payload.get("week_start")
+        if week_start is not None:
+            if not isinstance(week_start, str):
+                raise ValueError("week_start must be an ISO date string")
+            date.fromisoformat(week_start)  # ValueError on bad dates
+        fmt = payload.get("format", "json")
+        if not isinstance(fmt, str) or (fmt not in ("json", "text") and fmt not in IMAGE_FORMATS):
+            raise ValueError(f"format must be json, text or one of {', '.join(IMAGE_FORMATS)}")
+        speed = payload.get("speed", "balanced")
+        if not isinstance(speed, str) or speed not in IMAGE_SPEED_PRESETS:
+            raise ValueError(f"speed must be one of {', '.join(IMAGE_SPEED_PRESETS)}")
+        injury_text = payload.get("injury_text", "")
+        if not isinstance(injury_text, str):
+            raise ValueError("injury_text must be a string")
+        details = payload.get("details", False)
+        if not isinstance(details, bool):
+            raise ValueError("details must be true or false")
+        return cls(
+            days=tuple(d for d in WEEK_DAYS if d in days),
+            targets_by_day=tuple((d, tuple(targets[d])) for d in WEEK_DAYS if targets.get(d)),
+            difficulty=difficulty, duration=duration, injury_text=injury_text,
+            seed=seed, week_start=week_start, format=fmt, details=details, speed=speed,
+        )
+
+def compute_response(request: PlanRequest, catalog_path: Optional[str] = None) -> Tuple[str, bytes]:
+    # Runs on the executor (thread or worker process); returns (content type, body)
+    bundle = get_catalog_bundle(catalog_path)
+    avoid_tags = tags_from_injury_text(request.injury_text, matcher=bundle.injury_matcher)
+    seed = request.seed if request.seed is not None else random.randrange(1, 2**31)
+    start = datetime.fromisoformat(request.week_start) if request.week_start else None
+    targets = {day: list(muscles) for day, muscles in request.targets_by_day}
+    # Unseeded requests get a fresh random seed that can never be asked for again: keep them out of the cache
+    plan_fn = plan_week_cached if request.seed is not None else plan_week
+    week = plan_fn(start, list(request.days), targets, request.difficulty, request.duration, avoid_tags,
+                   seed=seed, catalog=bundle.catalog)
+    text = render_plan_text(week, show_details=request.details)
+    if request.format == "text":
+        return "text/plain; charset=utf-8", text.encode("utf-8")
+    if request.format in IMAGE_FORMATS:
+        image = get_png_cache().get_or_render(text, title="Weekly Workout Plan", fmt=request.format, speed=request.speed)
+        return IMAGE_FORMATS[request.format], image
+    body = {"seed": seed, "week_start": request.week_start, "avoid_tags": avoid_tags,
+            "catalog_version": bundle.catalog.version, "plan": week_to_dict(week), "text": text}
+    return "application/json", json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+# -----------------------
+# 🔀 Coalescing Service
+# -----------------------
+class PlanService:
+    """Runs plan requests on an executor, sharing one computation per distinct in-flight request."""
+
+    def __init__(self, executor: Optional[Executor] = None, catalog_path: Optional[str] = None):
+        self.executor = executor
+        self.catalog_path = catalog_path
+        # Only touched from the event loop thread, so no lock is needed
+        self._inflight: Dict[PlanRequest, asyncio.Future] = {}
+        self.requests = 0
+        self.computed = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def handle(self, request: PlanRequest) -> Tuple[str, bytes]:
+        self.requests += 1
+        future = self._inflight.get(request)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, compute_response, request, self.catalog_path)
+            self._inflight[request] = future
+            future.add_done_callback(lambda _, key=request: self._inflight.pop(key, None))
+            self.computed += 1
+        # A client hanging up must not cancel the computation others are waiting on
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, int]:
+        return {"requests": self.requests, "computed": self.computed, "coalesced": self.coalesced,
+                "errors": self.errors, "in_flight": len(self._inflight)}
+
+# -----------------------
+# 🌐 HTTP Layer
+# -----------------------
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, str, Dict[str, str], bytes]]:
+    # Returns None when the client closed the connection between requests
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431)
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPError(400, "Bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413)
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?", 1)[0], version, headers, body
+
+def encode_response(status: int, content_type: str, body: bytes, keep_alive: bool) -> bytes:
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+def json_error(status: int, message: str) -> Tuple[int, str, bytes]:
+    return status, "application/json", json.dumps({"error": message}).encode("utf-8")
+
+class PlanHTTPServer:
+    def __init__(self, service: PlanService):
+        self.service = service
+        self._muscle_groups: Tuple[object, FrozenSet[str]] = (None, frozenset())
+
+    @property
+    def muscle_groups(self) -> FrozenSet[str]:
+        # Follows catalog hot reloads; the set is rebuilt only when the bundle changes
+        bundle = get_catalog_bundle(self.service.catalog_path)
+        if self._muscle_groups[0] is not bundle:
+            self._muscle_groups = (bundle, frozenset(bundle.muscle_groups))
+        return self._muscle_groups[1]
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        if path == "/plan":
+            if method != "POST":
+                return json_error(405, "Use POST")
+            try:
+                request = PlanRequest.from_payload(json.loads(body or b"{}"), self.muscle_groups)
+            except ValueError as exc:  # includes json.JSONDecodeError
+                return json_error(400, str(exc))
+            content_type, payload = await self.service.handle(request)
+            return 200, content_type, payload
+        if method != "GET":
+            return json_error(405, "Use GET")
+        if path == "/health":
+            catalog = get_catalog_bundle(self.service.catalog_path).catalog
+            return 200, "application/json", json.dumps({"status": "ok", "catalog_version": catalog.version}).encode()
+        if path == "/stats":
+            return 200, "application/json", json.dumps({"service": self.service.stats(), "caches": cache_counters()}).encode()
+        return json_error(404, f"No route for {path}")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    parsed = await read_request(reader)
+                    if parsed is None:
+                        break
+                    method, path, version, headers, body = parsed
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+                    status, content_type, payload = await self.route(method, path, body)
+                except HTTPError as exc:
+                    status, content_type, payload = json_error(exc.status, str(exc))
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except Exception as exc:
+                    self.service.errors += 1
+                    status, content_type, payload = json_error(500, f"{type(exc).__name__}: {exc}")
+                writer.write(encode_response(status, content_type, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, workers: Optional[int] = None,
+                processes: bool = False, catalog_path: Optional[str] = None) -> None:
+    # Threads share the process-wide plan/render caches; processes sidestep the GIL
+    executor = ProcessPoolExecutor(max_workers=workers) if processes else ThreadPoolExecutor(max_workers=workers)
+    service = PlanService(executor, catalog_path=catalog_path)
+    http = PlanHTTPServer(service)
+    server = await asyncio.start_server(http.handle_connection, host, port, backlog=1024, limit=MAX_HEADER_BYTES)
+    print(f"Serving plans on http://{host}:{port} ({'processes' if processes else 'threads'}, "
+          f"workers={workers or 'auto'})", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve week plans over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="executor size (default: Python's default for the pool type)")
+    parser.add_argument("--processes", action="store_true", help="render on a process pool instead of threads")
+    parser.add_argument("--catalog", help="exercise catalog file (default: FORGE_CATALOG_PATH or built-in)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.processes, args.catalog))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,337 @@
+"""Persistent plan history in a local SQLite database.
+
+Weeks, days and exercise slots live in normalized tables, so history
+questions ("sets per muscle over the last 12 weeks") are single SQL
+aggregates over indexed columns instead of Python loops over stored plans.
+One PlanStore per database file is shared by every Streamlit session; it
+hands out connections from a small pool and runs in WAL mode so readers never
+wait on the writer.
+
+Set FORGE_PLAN_DB to choose the database file (default ``forge_plans.db``).
+
+    python workout_planner_store.py history forge_plans.db --user me --weeks 12
+"""
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import argparse
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from workout_planner_core import WEEK_DAYS, CATALOG, DayPlan, ExerciseCatalog, catalog_for_version
+
+DEFAULT_DB_PATH = "forge_plans.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weeks (
+    id              INTEGER PRIMARY KEY,
+    user_id         TEXT NOT NULL,
+    week_start      TEXT NOT NULL,   -- ISO date, so text order is date order
+    seed            INTEGER,         -- NULL when the week can't be replayed from one seed
+    catalog_version TEXT NOT NULL,
+    created_at      REAL NOT NULL,
+    UNIQUE (user_id, week_start)     -- also the per-user index
+);
+CREATE INDEX IF NOT EXISTS weeks_by_start ON weeks (week_start);
+
+CREATE TABLE IF NOT EXISTS days (
+    week_id         INTEGER NOT NULL REFERENCES weeks (id) ON DELETE CASCADE,
+    day_index       INTEGER NOT NULL,  -- position in WEEK_DAYS; rest days have no row
+    targets         TEXT NOT NULL,     -- ';'-joined muscle groups
+    difficulty      TEXT NOT NULL,
+    duration        INTEGER NOT NULL,
+    warm            INTEGER NOT NULL,
+    cool            INTEGER NOT NULL,
+    estimated_total INTEGER NOT NULL,
+    PRIMARY KEY (week_id, day_index)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS items (
+    week_id       INTEGER NOT NULL,
+    day_index     INTEGER NOT NULL,
+    position      INTEGER NOT NULL,
+    exercise      TEXT NOT NULL,
+    muscle        TEXT NOT NULL,
+    catalog_index INTEGER NOT NULL,  -- valid for the week's catalog_version
+    sets          INTEGER NOT NULL,
+    reps          INTEGER NOT NULL,
+    PRIMARY KEY (week_id, day_index, position),
+    FOREIGN KEY (week_id, day_index) REFERENCES days (week_id, day_index) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS items_by_muscle ON items (muscle, week_id);
+"""
+
+DateLike = Union[date, datetime, str]
+
+def _iso(day: DateLike) -> str:
+    if isinstance(day, datetime):
+        day = day.date()
+    return day.isoformat() if isinstance(day, date) else date.fromisoformat(day).isoformat()
+
+# -----------------------
+# 🔌 Connection Pool
+# -----------------------
+class ConnectionPool:
+    """Fixed set of SQLite connections shared across threads.
+
+    Connections are opened lazily up to ``size``; callers borrow one with
+    ``connection()`` and block when all are in use. Failures, including a
+    borrow that times out, raise sqlite3.Error.
+    """
+
+    def __init__(self, path: str, size: int = 4, timeout: float = 10.0):
+        self.path = path
+        # Every ":memory:" connection is its own database, so share exactly one
+        self.size = 1 if path == ":memory:" else size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        # isolation_level=None: transactions are explicit (BEGIN ... COMMIT) in PlanStore
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA synchronous = NORMAL")  # safe with WAL, far fewer fsyncs
+            conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = self._open()
+                except BaseException:
+                    with self._lock:
+                        self._opened -= 1  # the slot is free again for the next caller
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    # Same exception family as every other store failure, so callers need one except clause
+                    raise sqlite3.OperationalError(
+                        f"no pooled connection to {self.path} became free within {self.timeout:g}s") from None
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+# -----------------------
+# 🗄️ Plan Store
+# -----------------------
+class PlanStore:
+    """Saves week plans per user and week start, and answers history queries in SQL."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, pool_size: int = 4):
+        self.path = path
+        self.pool = ConnectionPool(path, size=pool_size)
+        # SQLite allows one writer at a time; queue writers here instead of spinning on SQLITE_BUSY
+        self._write_lock = threading.Lock()
+        with self.pool.connection() as conn:
+            if path != ":memory:":
+                conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.pool.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock, self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    # -- writes ------------------------------------------------------------
+    def save_week(self, user_id: str, week_start: DateLike, week: dict, seed: Optional[int] = None) -> int:
+        """Store (or replace) ``user_id``'s plan for ``week_start``; returns the week id."""
+        return self.save_weeks([(user_id, week_start, week, seed)])[0]
+
+    def save_weeks(self, records: Iterable[Tuple[str, DateLike, dict, Optional[int]]]) -> List[int]:
+        """Store many weeks in one transaction; day and item rows go in with executemany."""
+        now = time.time()
+        week_ids, day_rows, item_rows = [], [], []
+        with self._transaction() as conn:
+            for user_id, week_start, week, seed in records:
+                plans = [(i, week.get(day)) for i, day in enumerate(WEEK_DAYS) if week.get(day) is not None]
+                version = plans[0][1].catalog.version if plans else CATALOG.version
+                start = _iso(week_start)
+                # Replacing a week cascades to its days and items
+                conn.execute("DELETE FROM weeks WHERE user_id = ? AND week_start = ?", (user_id, start))
+                week_id = conn.execute(
+                    "INSERT INTO weeks (user_id, week_start, seed, catalog_version, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, start, seed, version, now)).lastrowid
+                week_ids.append(week_id)
+                for day_index, plan in plans:
+                    day_rows.append((week_id, day_index, ";".join(plan.targets), plan.difficulty, plan.duration,
+                                     plan.warm, plan.cool, plan.estimated_total))
+                    exercises = plan.catalog.exercises
+                    for position, (idx, sets, reps) in enumerate(zip(plan.exercise_idx, plan.sets, plan.reps)):
+                        ex = exercises[idx]
+                        item_rows.append((week_id, day_index, position, ex.name, ex.muscle, idx, sets, reps))
+            conn.executemany("INSERT INTO days VALUES (?, ?, ?, ?, ?, ?, ?, ?)", day_rows)
+            conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?)", item_rows)
+        return week_ids
+
+    def delete_week(self, user_id: str, week_start: DateLike) -> bool:
+        with self._transaction() as conn:
+            cur = conn.execute("DELETE FROM weeks WHERE user_id = ? AND week_start = ?", (user_id, _iso(week_start)))
+        return cur.rowcount > 0
+
+    # -- lookups -----------------------------------------------------------
+    def load_week(self, user_id: str, week_start: DateLike,
+                  catalog: Optional[ExerciseCatalog] = None) -> Optional[Tuple[dict, Optional[int]]]:
+        """Return (week, seed) for a stored week, or None.
+
+        Plans reuse the stored catalog indexes when that catalog version is
+        loaded; otherwise exercises are resolved by name in ``catalog`` and a
+        LookupError is raised if any of them no longer exists.
+        """
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT id, seed, catalog_version FROM weeks WHERE user_id = ? AND week_start = ?",
+                               (user_id, _iso(week_start))).fetchone()
+            if row is None:
+                return None
+            week_id, seed, version = row
+            days = conn.execute("SELECT day_index, targets, difficulty, duration, warm, cool, estimated_total "
+                                "FROM days WHERE week_id = ? ORDER BY day_index", (week_id,)).fetchall()
+            items = conn.execute("SELECT day_index, exercise, catalog_index, sets, reps FROM items "
+                                 "WHERE week_id = ? ORDER BY day_index, position", (week_id,)).fetchall()
+        try:
+            catalog, by_name = catalog_for_version(version), None
+        except LookupError:
+            catalog = catalog or CATALOG
+            by_name = {ex.name: i for i, ex in enumerate(catalog.exercises)}
+
+        slots: Dict[int, Tuple[List[int], List[int], List[int]]] = {}
+        for day_index, name, catalog_index, sets, reps in items:
+            idx, day_sets, day_reps = slots.setdefault(day_index, ([], [], []))
+            if by_name is not None:
+                if name not in by_name:
+                    raise LookupError(f"Stored exercise {name!r} is not in catalog {catalog.version}")
+                catalog_index = by_name[name]
+            idx.append(catalog_index)
+            day_sets.append(sets)
+            day_reps.append(reps)
+
+        week = dict.fromkeys(WEEK_DAYS)
+        for day_index, targets, difficulty, duration, warm, cool, estimated_total in days:
+            idx, sets, reps = slots.get(day_index, ([], [], []))
+            week[WEEK_DAYS[day_index]] = DayPlan(targets.split(";") if targets else [], difficulty, duration,
+                                                 warm, cool, estimated_total, catalog, idx, sets, reps)
+        return week, seed
+
+    def list_weeks(self, user_id: str, limit: int = 52) -> List[Tuple[str, Optional[int], float]]:
+        """Most recent stored weeks for a user as (week_start, seed, created_at)."""
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT week_start, seed, created_at FROM weeks WHERE user_id = ? "
+                                "ORDER BY week_start DESC LIMIT ?", (user_id, limit)).fetchall()
+
+    # -- history -----------------------------------------------------------
+    @staticmethod
+    def _window(weeks: int, until: Optional[DateLike]) -> Tuple[str, str]:
+        # Without ``until`` only the start is bounded, so weeks planned ahead of today still count
+        if until is None:
+            return (date.today() - timedelta(weeks=weeks)).isoformat(), "9999-12-31"
+        end = date.fromisoformat(_iso(until))
+        return (end - timedelta(weeks=weeks)).isoformat(), end.isoformat()
+
+    def sets_per_muscle(self, user_id: str, weeks: int = 12, until: Optional[DateLike] = None) -> Dict[str, int]:
+        """Total planned sets per muscle for weeks starting in (until - weeks, until].
+
+        With no ``until`` the window is every week starting after today - weeks,
+        including weeks already planned for the future.
+        """
+        start, end = self._window(weeks, until)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT i.muscle, SUM(i.sets) AS total FROM weeks w JOIN items i ON i.week_id = w.id "
+                "WHERE w.user_id = ? AND w.week_start > ? AND w.week_start <= ? "
+                "GROUP BY i.muscle ORDER BY total DESC, i.muscle", (user_id, start, end)).fetchall()
+        return dict(rows)
+
+    def sets_per_muscle_by_week(self, user_id: str, weeks: int = 12,
+                                until: Optional[DateLike] = None) -> List[Tuple[str, str, int]]:
+        """(week_start, muscle, sets) rows for the same window, oldest week first."""
+        start, end = self._window(weeks, until)
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT w.week_start, i.muscle, SUM(i.sets) FROM weeks w JOIN items i ON i.week_id = w.id "
+                "WHERE w.user_id = ? AND w.week_start > ? AND w.week_start <= ? "
+                "GROUP BY w.week_start, i.muscle ORDER BY w.week_start, i.muscle", (user_id, start, end)).fetchall()
+
+    def muscle_history(self, muscle: str, weeks: int = 12, until: Optional[DateLike] = None) -> List[Tuple[str, int]]:
+        """Sets per user for one muscle across all users (uses the muscle index)."""
+        start, end = self._window(weeks, until)
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT w.user_id, SUM(i.sets) FROM items i JOIN weeks w ON w.id = i.week_id "
+                "WHERE i.muscle = ? AND w.week_start > ? AND w.week_start <= ? "
+                "GROUP BY w.user_id ORDER BY 2 DESC", (muscle, start, end)).fetchall()
+
+# Shared by every session in the process, one per database file
+_STORES: Dict[str, PlanStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def get_plan_store(path: Optional[str] = None) -> PlanStore:
+    path = path or os.environ.get("FORGE_PLAN_DB") or DEFAULT_DB_PATH
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = PlanStore(path)
+        return store
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect the ForgeFitness plan history database.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    weeks_cmd = sub.add_parser("weeks", help="list stored weeks for a user")
+    history_cmd = sub.add_parser("history", help="sets per muscle over recent weeks")
+    for cmd in (weeks_cmd, history_cmd):
+        cmd.add_argument("db", nargs="?", default=None)
+        cmd.add_argument("--user", required=True)
+    history_cmd.add_argument("--weeks", type=int, default=12)
+    history_cmd.add_argument("--until", help="ISO date (default: today, plus any weeks planned ahead)")
+    args = parser.parse_args(argv)
+
+    store = get_plan_store(args.db)
+    if args.command == "weeks":
+        for week_start, seed, created_at in store.list_weeks(args.user):
+            saved = datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M")
+            print(f"{week_start}  seed={seed if seed is not None else '-':<12} saved {saved}")
+        return 0
+    for muscle, sets in store.sets_per_muscle(args.user, args.weeks, args.until).items():
+        print(f"{muscle:<12}{sets:>6}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
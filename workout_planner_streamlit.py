@@ -1,12 +1,32 @@
 
 import streamlit as st
-from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from typing import Tuple, Callable, Union
+import hashlib
+import inspect
 import random
-from datetime import datetime, timedelta
-from PIL import Image, ImageDraw, ImageFont
-import io
-import textwrap
+import secrets
+import sqlite3
+from datetime import datetime
+
+from workout_planner_core import (
+    DIFFICULTIES,
+    tags_from_injury_text,
+    plan_week,
+    plan_week_cached,
+    replan_week,
+    WeekInputs,
+    WEEK_DAYS,
+    render_plan_text,
+    get_plan_cache,
+    get_png_cache,
+    get_font_registry,
+    cache_counters,
+    IMAGE_FORMATS,
+    IMAGE_SPEED_PRESETS,
+)
+from workout_planner_catalog import get_catalog_bundle
+from workout_planner_store import get_plan_store
+from workout_planner_metrics import RerunMetrics, stage_summary, DEBUG as METRICS_DEBUG
 
 # -----------------------
 # 🎨 Global Page Settings
@@ -70,327 +90,90 @@ small, p, li, div { color: #e5e7eb; }
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # -----------------------
-# 🧠 Exercise Library
+# ⏱️ Rerun Instrumentation
 # -----------------------
-@dataclass
-class Exercise:
-    name: str
-    muscle: str
-    difficulty: str  # "Beginner" | "Intermediate" | "Advanced"
-    tags: List[str]
-
-EXERCISES: List[Exercise] = [
-    # Chest
-    Exercise("Push-Up", "Chest", "Beginner", ["bodyweight", "shoulder", "wrist"]),
-    Exercise("Incline Dumbbell Press", "Chest", "Intermediate", ["shoulder"]),
-    Exercise("Barbell Bench Press", "Chest", "Intermediate", ["shoulder", "barbell"]),
-    Exercise("Machine Chest Press", "Chest", "Beginner", ["machine", "shoulder"]),
-    Exercise("Cable Fly", "Chest", "Intermediate", ["shoulder", "cable"]),
-
-    # Back
-    Exercise("Lat Pulldown", "Back", "Beginner", ["shoulder", "machine"]),
-    Exercise("Seated Cable Row", "Back", "Beginner", ["lower-back", "cable"]),
-    Exercise("Pull-Up", "Back", "Advanced", ["shoulder", "grip"]),
-    Exercise("Barbell Bent-Over Row", "Back", "Intermediate", ["lower-back", "barbell"]),
-    Exercise("Single-Arm Dumbbell Row", "Back", "Beginner", ["lower-back", "dumbbell"]),
-
-    # Shoulders
-    Exercise("Dumbbell Shoulder Press", "Shoulders", "Intermediate", ["shoulder", "spine"]),
-    Exercise("Lateral Raise", "Shoulders", "Beginner", ["shoulder"]),
-    Exercise("Face Pull", "Shoulders", "Beginner", ["shoulder", "cable"]),
-    Exercise("Arnold Press", "Shoulders", "Advanced", ["shoulder"]),
-
-    # Biceps
-    Exercise("EZ-Bar Curl", "Biceps", "Beginner", ["elbow", "barbell"]),
-    Exercise("Dumbbell Curl", "Biceps", "Beginner", ["elbow", "dumbbell"]),
-    Exercise("Incline Dumbbell Curl", "Biceps", "Intermediate", ["elbow"]),
-    Exercise("Cable Curl", "Biceps", "Intermediate", ["elbow", "cable"]),
-
-    # Triceps
-    Exercise("Cable Triceps Pushdown", "Triceps", "Beginner", ["elbow", "cable"]),
-    Exercise("Overhead Triceps Extension", "Triceps", "Intermediate", ["shoulder", "elbow"]),
-    Exercise("Close-Grip Bench Press", "Triceps", "Advanced", ["shoulder", "elbow", "barbell"]),
-
-    # Legs: Quads, Hamstrings, Calves, Glutes
-    Exercise("Back Squat", "Quads", "Advanced", ["knee", "spine", "barbell"]),
-    Exercise("Front Squat", "Quads", "Advanced", ["knee", "spine", "barbell"]),
-    Exercise("Leg Press", "Quads", "Beginner", ["knee", "machine"]),
-    Exercise("Walking Lunges", "Quads", "Intermediate", ["knee", "balance"]),
-    Exercise("Romanian Deadlift", "Hamstrings", "Intermediate", ["hamstrings", "hip-hinge", "spine", "barbell"]),
-    Exercise("Hamstring Curl (Machine)", "Hamstrings", "Beginner", ["machine", "knee"]),
-    Exercise("Hip Thrust", "Glutes", "Beginner", ["hip"]),
-    Exercise("Calf Raise (Standing)", "Calves", "Beginner", ["ankle"]),
-    Exercise("Seated Calf Raise", "Calves", "Beginner", ["ankle", "machine"]),
-
-    # Core
-    Exercise("Plank", "Abs", "Beginner", ["wrist", "shoulder"]),
-    Exercise("Hanging Knee Raise", "Abs", "Intermediate", ["shoulder", "grip"]),
-    Exercise("Cable Woodchop", "Abs", "Intermediate", ["spine", "cable"]),
-    Exercise("Bicycle Crunch", "Abs", "Beginner", []),
-
-    # Forearms
-    Exercise("Reverse Curl", "Forearms", "Beginner", ["wrist", "elbow"]),
-    Exercise("Farmer's Carry", "Forearms", "Intermediate", ["grip"]),
-
-    # Cardio / Weight loss helpers
-    Exercise("Treadmill Intervals", "Cardio", "Beginner", ["cardio", "knee"]),
-    Exercise("Stationary Bike", "Cardio", "Beginner", ["cardio", "knee-friendly"]),
-    Exercise("Rowing Machine", "Cardio", "Intermediate", ["cardio", "back", "shoulder"]),
-    Exercise("Jump Rope", "Cardio", "Intermediate", ["cardio", "ankle"]),
-]
-
-MUSCLE_GROUPS = ["Chest","Back","Shoulders","Biceps","Triceps","Abs","Calves","Quads","Hamstrings","Glutes","Forearms","Cardio"]
-DIFFICULTIES = ["Beginner","Intermediate","Advanced"]
-
-# Injury keyword map -> tags to avoid
-INJURY_TAGS = {
-    "shoulder": ["shoulder","overhead"],
-    "elbow": ["elbow"],
-    "wrist": ["wrist"],
-    "knee": ["knee"],
-    "ankle": ["ankle"],
-    "lower back": ["lower-back","spine","deadlift","hip-hinge"],
-    "back": ["lower-back","spine","back"],
-    "neck": ["neck","overhead"],
-    "hip": ["hip","hip-hinge"],
-    "hamstring": ["hamstrings"],
-    "achilles": ["ankle"],
-}
+def loadtest_session() -> str:
+    # ?loadtest=<id> labels this session's records (full and fragment reruns) for benchmarks/load_app.py
+    return st.query_params.get("loadtest", "")
+
+metrics = RerunMetrics(counters=cache_counters, session=loadtest_session())
+# Server-side opt-in only: the panel shows every session's rerun history and profile paths
+debug_panel = METRICS_DEBUG
+
+# Shared by every session; reloads when FORGE_CATALOG_PATH's file changes
+catalog_bundle = get_catalog_bundle()
+catalog = catalog_bundle.catalog
+MUSCLE_GROUPS = catalog_bundle.muscle_groups
+# One pooled SQLite store for all sessions (FORGE_PLAN_DB, default forge_plans.db).
+# Planning still works without it; only saving and history are disabled.
+try:
+    plan_store = get_plan_store()
+    plan_store_error = None
+except sqlite3.Error as exc:
+    plan_store, plan_store_error = None, str(exc)
 
 # -----------------------
-# 🧮 Helper Functions
+# 📦 Download Helpers
 # -----------------------
-def estimate_set_minutes(difficulty: str) -> float:
-    # Harder = slightly longer sets & rests
-    if difficulty == "Beginner":
-        return 0.5 + 1.0  # 0.5 set + 1.0 rest = 1.5
-    if difficulty == "Intermediate":
-        return 0.6 + 1.2  # 1.8
-    return 0.7 + 1.5      # 2.2
-
-def warmup_cooldown_minutes(difficulty: str) -> Tuple[int, int]:
-    if difficulty == "Beginner":
-        return (8, 8)
-    if difficulty == "Intermediate":
-        return (10, 10)
-    return (12, 12)
-
-def choose_exercises(targets: List[str], difficulty: str, avoid_tags: List[str], n: int) -> List[Exercise]:
-    pool = [ex for ex in EXERCISES if (ex.muscle in targets or ("Cardio" in targets and ex.muscle=="Cardio"))]
-    # Filter difficulty upwards (beginner can use beginner+intermediate, advanced can use all)
-    if difficulty == "Beginner":
-        pool = [ex for ex in pool if ex.difficulty in ["Beginner","Intermediate"]]
-    elif difficulty == "Intermediate":
-        pool = [ex for ex in pool if ex.difficulty in ["Beginner","Intermediate","Advanced"]]
-    else:
-        pool = pool  # all
+def _streamlit_version() -> Tuple[int, ...]:
+    parts = []
+    for p in st.__version__.split(".")[:2]:
+        digits = "".join(ch for ch in p if ch.isdigit())
+        parts.append(int(digits or 0))
+    return tuple(parts)
+
+def _download_accepts_callable() -> bool:
+    # Streamlit 1.52+ takes a callable for download_button data and only calls it on click;
+    # older releases reject it with "Invalid binary data format", so fall back to eager bytes
+    if _streamlit_version() >= (1, 52):
+        return True
+    try:
+        annotation = inspect.signature(st.download_button).parameters["data"].annotation
+    except (TypeError, ValueError, KeyError):
+        return False
+    return "Callable" in str(annotation)
 
-    # Avoid exercises with risky tags
-    if avoid_tags:
-        pool = [ex for ex in pool if not any(tag in avoid_tags for tag in ex.tags)]
-
-    # Ensure diversity by muscle
-    by_muscle: Dict[str, List[Exercise]] = {}
-    for ex in pool:
-        by_muscle.setdefault(ex.muscle, []).append(ex)
-
-    # Round-robin pick across muscles
-    selected = []
-    muscles = [m for m in targets if m in by_muscle]
-    if not muscles and pool:
-        muscles = [pool[0].muscle]
-    idx = 0
-    while len(selected) < n and muscles:
-        m = muscles[idx % len(muscles)]
-        if by_muscle.get(m):
-            choice = random.choice(by_muscle[m])
-            # prevent duplicates by name
-            if choice.name not in [s.name for s in selected]:
-                selected.append(choice)
-        idx += 1
-        if idx > 100:  # safety
-            break
-    # If still short, fill randomly
-    if len(selected) < n:
-        remainder = [ex for ex in pool if ex.name not in [s.name for s in selected]]
-        random.shuffle(remainder)
-        selected += remainder[: (n - len(selected))]
-    return selected[:n]
-
-def build_day_plan(targets: List[str], difficulty: str, duration_min: int, avoid_tags: List[str]):
-    # Choose 3-5 exercises; 2-3 sets of 8-12 reps
-    warm, cool = warmup_cooldown_minutes(difficulty)
-    remaining = max(duration_min - (warm + cool), 30)
-    per_set = estimate_set_minutes(difficulty)  # minutes per set incl. rest
-
-    # Decide number of exercises initially
-    n_ex = 4
-    if remaining < 60: n_ex = 3
-    if remaining > 80: n_ex = 5
-    exercises = choose_exercises(targets, difficulty, avoid_tags, n_ex)
-
-    # Start with baseline sets/reps
-    plan = []
-    total_minutes = warm + cool
-    for ex in exercises:
-        sets = 2 if difficulty == "Beginner" else 3
-        reps = 10
-        # Slight variation by difficulty
-        if difficulty == "Beginner":
-            reps = random.choice([8,10,12])
-        elif difficulty == "Intermediate":
-            reps = random.choice([8,10,12])
-        else:
-            reps = random.choice([8,10,12])
-        est = sets * per_set
-        total_minutes += est
-        plan.append({"exercise": ex, "sets": sets, "reps": reps, "est_min": est})
-
-    # Adjust sets to better match target duration
-    # If under target by >10 min, try to add one set to some exercises (up to 3)
-    def current_total():
-        return warm + cool + sum(item["est_min"] for item in plan)
-    tries = 0
-    while current_total() < duration_min - 8 and tries < 20:
-        for item in plan:
-            if item["sets"] < 3:
-                item["sets"] += 1
-                item["est_min"] += per_set
-                if current_total() >= duration_min - 4:
-                    break
-        tries += 1
-
-    # If over target by >10 min, remove some sets (down to 2)
-    tries = 0
-    while current_total() > duration_min + 8 and tries < 20:
-        for item in plan:
-            if item["sets"] > 2:
-                item["sets"] -= 1
-                item["est_min"] -= per_set
-                if current_total() <= duration_min + 4:
-                    break
-        tries += 1
-
-    # Build textual steps
-    steps = []
-    steps.append(f"Stretch & Warm-up • {warm} min (dynamic warm-up for: {', '.join(targets)})")
-    for item in plan:
-        name = item["exercise"].name
-        m = item["exercise"].muscle
-        sets = item["sets"]
-        reps = item["reps"]
-        steps.append(f"{sets} sets × {reps} reps • {name} ({m})")
-        # Rest guidance by difficulty
-        if difficulty == "Beginner":
-            rest = 60
-        elif difficulty == "Intermediate":
-            rest = 75
-        else:
-            rest = 90
-        steps.append(f"Rest • {int(rest/60)}–{int((rest+30)/60)} min")
-    steps.append(f"Cool-down & Stretch • {cool} min (static stretching for: {', '.join(targets)})")
-
-    return {
-        "targets": targets,
-        "difficulty": difficulty,
-        "duration": duration_min,
-        "warm": warm,
-        "cool": cool,
-        "items": plan,
-        "steps": steps,
-        "estimated_total": round(current_total())
-    }
-
-def plan_week(start_date: datetime, selected_days: List[str], targets_by_day: Dict[str, List[str]], difficulty: str, daily_duration: int, avoid_tags: List[str]):
-    day_names = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-    week = {}
-    for i, day in enumerate(day_names):
-        if day in selected_days:
-            targets = targets_by_day.get(day, [])
-            if not targets:
-                targets = ["Cardio"]  # default if none chosen
-            week[day] = build_day_plan(targets, difficulty, daily_duration, avoid_tags)
-        else:
-            week[day] = None
-    return week
-
-def tags_from_injury_text(txt: str) -> List[str]:
-    txt = (txt or "").lower()
-    avoid = set()
-    for key, vals in INJURY_TAGS.items():
-        if key in txt:
-            avoid.update(vals)
-    # also collect raw words like 'shoulder', 'knee'
-    for word in ["shoulder","elbow","wrist","knee","ankle","back","lower back","neck","hip","hamstring","achilles"]:
-        if word in txt:
-            avoid.add(word if word!="lower back" else "lower-back")
-    return list(avoid)
-
-def render_plan_text(week, show_details: bool = False) -> str:
-    out = []
-    for day, plan in week.items():
-        out.append(f"=== {day} ===")
-        if plan is None:
-            out.append("Rest Day")
-        else:
-            out.append(f"Difficulty: {plan['difficulty']} • Target Duration: {plan['duration']} min • Estimated: {plan['estimated_total']} min")
-            out.append(f"Targets: {', '.join(plan['targets'])}")
-            if show_details:
-                for step in plan["steps"]:
-                    out.append(f"- {step}")
-            else:
-                # summary
-                for item in plan["items"]:
-                    ex = item["exercise"]
-                    out.append(f"- {ex.name} ({ex.muscle}): {item['sets']} × {item['reps']}")
-        out.append("")
-    return "\n".join(out).strip()
-
-def plan_to_png(text: str, title: str = "Workout Plan") -> bytes:
-    # Render a simple image from text for easy saving/sharing
-    padding = 40
-    line_width = 70
-    wrapped = []
-    for line in text.split("\n"):
-        if len(line) > line_width:
-            wrapped.extend(textwrap.wrap(line, width=line_width))
-        else:
-            wrapped.append(line)
+LAZY_DOWNLOADS = _download_accepts_callable()
 
-    # Basic font
-    try:
-        font = ImageFont.truetype("DejaVuSans.ttf", 20)
-        title_font = ImageFont.truetype("DejaVuSans-Bold.ttf", 26)
-    except:
-        font = ImageFont.load_default()
-        title_font = ImageFont.load_default()
-
-    line_height = 28
-    height = padding*2 + line_height*(len(wrapped)+2)
-    width = 1100
-    img = Image.new("RGB", (width, height), color=(18, 24, 38))
-    draw = ImageDraw.Draw(img)
-
-    # Title
-    draw.text((padding, padding-10), f"💪 {title}", font=title_font, fill=(240, 240, 255))
-
-    # Body
-    y = padding + 28
-    for line in wrapped:
-        draw.text((padding, y), line, font=font, fill=(220, 225, 235))
-        y += line_height
-
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    return buf.getvalue()
+def image_download_data(text: str, title: str, fmt: str = "png", speed: str = "balanced") -> Union[bytes, Callable[[], bytes]]:
+    cache = get_png_cache()
+    if LAZY_DOWNLOADS:
+        return lambda: cache.get_or_render(text, title=title, fmt=fmt, speed=speed)
+    return cache.get_or_render(text, title=title, fmt=fmt, speed=speed)
+
+MIN_HISTORY_KEY = 12
+
+def history_user_id(athlete: str, key: str) -> str:
+    """Store user id for an athlete under a private key; empty when either is missing or the key is too short."""
+    if not athlete or len(key) < MIN_HISTORY_KEY:
+        return ""
+    return f"{athlete}#{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}"
+
+def image_settings() -> Tuple[str, str]:
+    return st.session_state.get("image_format", "png"), st.session_state.get("image_speed", "balanced")
 
 # -----------------------
 # 🧭 Sidebar Controls
 # -----------------------
-with st.sidebar:
+with st.sidebar, metrics.stage("sidebar"):
     st.markdown("## 💪 ForgeFitness")
     st.caption("Plan your week with difficulty, duration, target muscles & safety filters.")
     st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
+    # No shared default: sessions that leave this empty don't save weeks or read anyone's history
+    athlete = st.text_input("Athlete", value="", placeholder="Your name",
+                            help="Generated weeks are saved per athlete and week start, under the history key "
+                                 "below. Leave empty to skip saving.").strip()
+    # Saved weeks are keyed by athlete + a random per-visitor key, so knowing a name isn't enough to
+    # read or overwrite someone's history. The key rides in ?history= so a bookmark finds it again.
+    st.session_state.setdefault("history_key", st.query_params.get("history") or secrets.token_urlsafe(16))
+    history_key = st.text_input("History key", key="history_key", type="password",
+                                help="Private key for your saved weeks. Bookmark this page (the key is in its "
+                                     "link) or paste the key on another device to get them back. Anyone with "
+                                     f"the key can see and change these weeks. At least {MIN_HISTORY_KEY} "
+                                     "characters.").strip()
+    if st.query_params.get("history") != history_key:
+        st.query_params["history"] = history_key
+    history_user = history_user_id(athlete, history_key)
     week_start = st.date_input("Week starting", value=datetime.today())
     difficulty = st.select_slider("Difficulty", DIFFICULTIES, value="Intermediate")
     duration = st.slider("Daily target duration (minutes)", min_value=60, max_value=120, value=75, step=5)
@@ -399,13 +182,13 @@ with st.sidebar:
     st.markdown("### Targeted muscle groups")
     targets_global = st.multiselect(
         "Pick overall targets (you can refine by day below)",
-        MUSCLE_GROUPS, default=["Chest","Back","Quads","Hamstrings","Abs"]
+        MUSCLE_GROUPS, default=[m for m in ["Chest","Back","Quads","Hamstrings","Abs"] if m in MUSCLE_GROUPS]
     )
 
     st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
     st.markdown("### Safety: injuries or fatigue")
     injuries_text = st.text_area("List injuries/fatigue (e.g., 'knee pain, shoulder')", height=80, placeholder="knee pain, lower back, wrist...")
-    avoid_tags = tags_from_injury_text(injuries_text)
+    avoid_tags = tags_from_injury_text(injuries_text, matcher=catalog_bundle.injury_matcher)
     if avoid_tags:
         st.markdown("**Exercises will avoid tags:** " + ", ".join([f"<span class='pill'>{t}</span>" for t in avoid_tags]), unsafe_allow_html=True)
     else:
@@ -415,6 +198,15 @@ with st.sidebar:
     st.markdown("### Days you plan to train")
     planned_days = st.multiselect("Choose training days", ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"],
                                   default=["Monday","Wednesday","Friday"])
+    plan_seed = st.number_input("Plan seed (0 = surprise me)", min_value=0, max_value=2**31 - 1, value=0, step=1,
+                                help="Reuse a seed to get the exact same week again.")
+    # WebP is smaller but always slower to encode than PNG, so it's left to the bulk export and service
+    st.selectbox("Image format", ["png", "svg"], format_func=str.upper, key="image_format",
+                 help="PNG works everywhere; SVG is tiny and stays sharp at any zoom.")
+    st.select_slider("Image export", list(IMAGE_SPEED_PRESETS), value="balanced", key="image_speed",
+                     help="fast = quickest encode, small = smallest file.")
+    keep_unchanged = st.checkbox("Keep unchanged days when regenerating", value=True,
+                                 help="Only replan days whose targets changed. Changing difficulty, duration or injuries replans every day.")
 
 # -----------------------
 # 📅 Per-day target selection
@@ -422,7 +214,7 @@ with st.sidebar:
 st.title("🏋️‍♀️ ForgeFitness")
 st.caption("Plan a balanced week. Click a day to view full session details, export as image, or copy text.")
 
-with st.expander("Optional: customize targets per day"):
+with st.expander("Optional: customize targets per day"), metrics.stage("sidebar"):
     cols = st.columns(4)
     targets_by_day = {}
     all_days = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
@@ -438,79 +230,189 @@ if "week_plan" not in st.session_state:
 
 if st.button("✨ Generate Weekly Plan", type="primary", use_container_width=True):
     week_dt = datetime.combine(week_start, datetime.min.time())
-    st.session_state.week_plan = plan_week(week_dt, planned_days, targets_by_day, difficulty, duration, avoid_tags)
+    seed = int(plan_seed) or random.randrange(1, 2**31)
+    inputs = WeekInputs.from_args(planned_days, targets_by_day, difficulty, duration, avoid_tags, catalog=catalog)
+    previous_inputs = st.session_state.get("plan_inputs")
+    with metrics.stage("plan_generation"):
+        # Unchanged inputs mean the user wants a fresh week, so only diff when something changed
+        if keep_unchanged and st.session_state.week_plan and previous_inputs is not None and previous_inputs != inputs:
+            st.session_state.week_plan, rebuilt = replan_week(st.session_state.week_plan, previous_inputs, inputs, seed=seed, catalog=catalog)
+            st.session_state.plan_seed = None  # a mixed week can't be reproduced from one seed
+        else:
+            # Only user-chosen seeds can repeat, so random ones bypass the shared cache instead of evicting from it
+            plan_fn = plan_week_cached if plan_seed else plan_week
+            st.session_state.week_plan = plan_fn(week_dt, planned_days, targets_by_day, difficulty, duration, avoid_tags, seed=seed, catalog=catalog)
+            st.session_state.plan_seed = seed
+            rebuilt = list(WEEK_DAYS)
+    st.session_state.plan_inputs = inputs
+    st.session_state.rebuilt_days = rebuilt
     st.session_state.selected_day = None
+    st.session_state.plan_version = st.session_state.get("plan_version", 0) + 1
+    if history_user and plan_store is not None:
+        with metrics.stage("plan_store"):
+            try:
+                plan_store.save_week(history_user, week_start, st.session_state.week_plan, seed=st.session_state.plan_seed)
+            except sqlite3.Error as exc:
+                st.warning(f"Plan generated but not saved to history: {exc}")
+
+# -----------------------
+# 📚 Saved Weeks & History
+# -----------------------
+def show_history(user_id: str):
+    saved_weeks = plan_store.list_weeks(user_id)
+    if not saved_weeks:
+        st.caption("No saved weeks yet. Generated plans are saved automatically.")
+    else:
+        h1, h2 = st.columns([3, 1])
+        with h1:
+            reopen = st.selectbox("Reopen a saved week", [w[0] for w in saved_weeks], format_func=lambda d: f"Week of {d}")
+        with h2:
+            st.markdown("<div style='height: 28px'></div>", unsafe_allow_html=True)
+            open_clicked = st.button("📂 Open", use_container_width=True)
+        if open_clicked:
+            try:
+                loaded = plan_store.load_week(user_id, reopen, catalog=catalog)
+            except LookupError as exc:
+                loaded = None
+                st.warning(f"That week can't be shown with the current exercise catalog: {exc}")
+            if loaded is not None:
+                # A stored week is an indexed lookup; nothing is replanned
+                st.session_state.week_plan, st.session_state.plan_seed = loaded
+                st.session_state.plan_inputs = None  # next Generate rebuilds the whole week
+                st.session_state.rebuilt_days = list(WEEK_DAYS)
+                st.session_state.selected_day = None
+                st.session_state.plan_version = st.session_state.get("plan_version", 0) + 1
+        sets_by_muscle = plan_store.sets_per_muscle(user_id, weeks=12)
+        if sets_by_muscle:
+            st.markdown("**Planned sets per muscle (last 12 weeks and weeks planned ahead)**")
+            st.bar_chart(sets_by_muscle)
+
+with st.expander("📚 Saved weeks & training history"), metrics.stage("history"):
+    if plan_store is None:
+        st.warning(f"Plan history is unavailable: {plan_store_error}")
+    elif not athlete:
+        st.caption("Enter an athlete name in the sidebar to save weeks and see their history.")
+    elif not history_user:
+        st.caption(f"Use a history key of at least {MIN_HISTORY_KEY} characters to save weeks and see their history.")
+    else:
+        try:
+            show_history(history_user)
+        except sqlite3.Error as exc:
+            st.warning(f"Plan history is unavailable right now: {exc}")
 
 week_plan = st.session_state.get("week_plan", {})
 
 # -----------------------
-# 🗓️ Weekly Overview Grid
+# 🗓️ Weekly Overview Grid + 🔎 Day Detail View
 # -----------------------
-if week_plan:
+# Each section is a fragment: widgets inside it rerun only that fragment, so a
+# "View {day}" click redraws the grid and detail view but not the sidebar,
+# plan generation or weekly export. Derived text is memoized per plan version.
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda fn: fn)
+
+def session_memo(name: str, key, compute: Callable[[], str]) -> str:
+    memo = st.session_state.setdefault("_memo", {})
+    hit = memo.get(name)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    value = compute()
+    memo[name] = (key, value)
+    return value
+
+def day_session_text(day: str, plan) -> str:
+    return "\n".join([f"{day} Session ({plan.difficulty} • {plan.estimated_total} min)",
+                      f"Targets: {', '.join(plan.targets)}",
+                      ""] + [f"- {s}" for s in plan.steps])
+
+@fragment
+def week_view(week_plan: dict, plan_version: int):
+    fragment_metrics = RerunMetrics(counters=cache_counters, scope="fragment:week_view", profile_fraction=0,
+                                   session=loadtest_session())
     st.subheader("Your Week at a Glance")
-    grid_cols = st.columns(7)
-    days = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-    for i, day in enumerate(days):
-        with grid_cols[i]:
-            st.markdown(f"#### {day}")
-            card = st.container()
-            with card:
-                st.markdown("<div class='day-card'>", unsafe_allow_html=True)
-                if week_plan.get(day) is None:
-                    st.markdown("**Rest Day**")
-                else:
-                    p = week_plan[day]
-                    st.markdown(f"**{', '.join(p['targets'])}**")
-                    st.caption(f"~{p['estimated_total']} min • {p['difficulty']}")
-                    for item in p["items"]:
-                        ex = item["exercise"]
-                        st.markdown(f"- {ex.name}: {item['sets']}×{item['reps']}")
-                view = st.button(f"View {day}", key=f"view_{day}", use_container_width=True)
-                st.markdown("</div>", unsafe_allow_html=True)
-                if view:
-                    st.session_state.selected_day = day
-
-    # Weekly export options
+    if st.session_state.get("plan_seed"):
+        st.caption(f"Plan seed: {st.session_state.plan_seed}")
+    rebuilt = st.session_state.get("rebuilt_days") or []
+    if 0 < len(rebuilt) < len(WEEK_DAYS):
+        st.caption(f"Updated: {', '.join(rebuilt)} • other days kept")
+    with fragment_metrics.stage("grid_render"):
+        grid_cols = st.columns(7)
+        days = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+        for i, day in enumerate(days):
+            with grid_cols[i]:
+                st.markdown(f"#### {day}")
+                card = st.container()
+                with card:
+                    st.markdown("<div class='day-card'>", unsafe_allow_html=True)
+                    if week_plan.get(day) is None:
+                        st.markdown("**Rest Day**")
+                    else:
+                        p = week_plan[day]
+                        st.markdown(f"**{', '.join(p.targets)}**")
+                        st.caption(f"~{p.estimated_total} min • {p.difficulty}")
+                        for item in p.items:
+                            st.markdown(f"- {item.exercise.name}: {item.sets}×{item.reps}")
+                    view = st.button(f"View {day}", key=f"view_{day}", use_container_width=True)
+                    st.markdown("</div>", unsafe_allow_html=True)
+                    if view:
+                        st.session_state.selected_day = day
+
+    selected_day = st.session_state.get("selected_day")
+    if selected_day:
+        st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
+        st.header(f"📘 {selected_day} — Full Session")
+        plan = week_plan.get(selected_day)
+        if plan is None:
+            st.info("This is a Rest Day. Consider light mobility, walking, or yoga.")
+        else:
+            # Steps
+            st.markdown("**Session Steps**")
+            for step in plan.steps:  # generated on display, not stored in session state
+                st.markdown(f"- {step}")
+
+            # Copyable text + image export
+            st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
+            st.subheader("Export This Session")
+            with fragment_metrics.stage("text_export"):
+                day_text = session_memo("day_text", (plan_version, selected_day), lambda: day_session_text(selected_day, plan))
+            c1, c2 = st.columns([1,1])
+            with c1:
+                st.text_area("Copy text plan", day_text, height=280)
+            with c2:
+                fmt, speed = image_settings()
+                with fragment_metrics.stage("image_export"):
+                    img_data = image_download_data(day_text, title=f"{selected_day} Workout", fmt=fmt, speed=speed)
+                st.download_button(f"📥 Download Session ({fmt.upper()})", data=img_data, file_name=f"{selected_day.lower()}_session.{fmt}", mime=IMAGE_FORMATS[fmt], use_container_width=True)
+
+            st.caption("Tip: Save images to share with friends or keep them in your photo gallery.")
+    fragment_metrics.finish()
+
+# -----------------------
+# 📤 Weekly Export
+# -----------------------
+@fragment
+def weekly_export(week_plan: dict, plan_version: int):
+    fragment_metrics = RerunMetrics(counters=cache_counters, scope="fragment:weekly_export", profile_fraction=0,
+                                   session=loadtest_session())
     st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
     st.subheader("Export Weekly Plan")
-    weekly_text = render_plan_text(week_plan, show_details=False)
+    with fragment_metrics.stage("text_export"):
+        weekly_text = session_memo("weekly_text", plan_version, lambda: render_plan_text(week_plan, show_details=False))
     colW1, colW2 = st.columns([1,1])
     with colW1:
         st.text_area("Copy weekly summary", weekly_text, height=240)
     with colW2:
-        png_bytes = plan_to_png(weekly_text, title="Weekly Workout Plan")
-        st.download_button("📥 Download Weekly Plan (PNG)", data=png_bytes, file_name="weekly_workout_plan.png", mime="image/png", use_container_width=True)
+        fmt, speed = image_settings()
+        with fragment_metrics.stage("image_export"):
+            img_data = image_download_data(weekly_text, title="Weekly Workout Plan", fmt=fmt, speed=speed)
+        st.download_button(f"📥 Download Weekly Plan ({fmt.upper()})", data=img_data, file_name=f"weekly_workout_plan.{fmt}", mime=IMAGE_FORMATS[fmt], use_container_width=True)
+    fragment_metrics.finish()
 
-# -----------------------
-# 🔎 Day Detail View
-# -----------------------
-selected_day = st.session_state.get("selected_day")
-if selected_day:
-    st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
-    st.header(f"📘 {selected_day} — Full Session")
-    plan = week_plan.get(selected_day)
-    if plan is None:
-        st.info("This is a Rest Day. Consider light mobility, walking, or yoga.")
-    else:
-        # Steps
-        st.markdown("**Session Steps**")
-        for step in plan["steps"]:
-            st.markdown(f"- {step}")
-
-        # Copyable text + PNG export
-        st.markdown("<div class='hr'></div>", unsafe_allow_html=True)
-        st.subheader("Export This Session")
-        day_text = "\n".join([f"{selected_day} Session ({plan['difficulty']} • {plan['estimated_total']} min)",
-                              f"Targets: {', '.join(plan['targets'])}",
-                              ""] + [f"- {s}" for s in plan["steps"]])
-        c1, c2 = st.columns([1,1])
-        with c1:
-            st.text_area("Copy text plan", day_text, height=280)
-        with c2:
-            img_bytes = plan_to_png(day_text, title=f"{selected_day} Workout")
-            st.download_button("📥 Download Session (PNG)", data=img_bytes, file_name=f"{selected_day.lower()}_session.png", mime="image/png", use_container_width=True)
-
-        st.caption("Tip: Save images to share with friends or keep them in your photo gallery.")
+if week_plan:
+    plan_version = st.session_state.get("plan_version", 0)
+    with metrics.stage("week_view"):
+        week_view(week_plan, plan_version)
+    with metrics.stage("weekly_export"):
+        weekly_export(week_plan, plan_version)
 
 # -----------------------
 # ℹ️ Footer
@@ -520,8 +422,32 @@ with st.expander("ℹ️ How the planner is built"):
     st.write(
         """
         - Exercises are filtered by your selected **targets**, **difficulty**, and inferred **injury/fatigue** tags.
-        - Each day includes a **warm-up**, **3–5 exercises** (each **2–3 sets** of **8–12 reps**), appropriate **rests**, and a **cool-down**.
-        - The planner adjusts sets to fit your chosen **duration** (1–2 hours).
-        - Export options let you **copy** the plan or **download** a tidy **PNG** image.
+        - Each day includes a **warm-up**, **3–8 exercises** (each **2–5 sets** of **8–12 reps**), appropriate **rests**, and a **cool-down**.
+        - The planner solves for the number of exercises and sets that best fill your chosen **duration** (1–2 hours).
+        - Export options let you **copy** the plan or **download** a tidy **PNG** or **SVG** image.
         """
     )
+    st.caption(f"Exercise catalog: {len(catalog)} exercises • {catalog_bundle.source or 'built-in'} • version {catalog.version}")
+    cache_stats = get_png_cache().stats()
+    st.caption(f"Image render cache: {cache_stats['hits']} hits • {cache_stats['misses']} misses • {cache_stats['entries']}/{cache_stats['max_entries']} entries")
+    plan_stats = get_plan_cache().stats()
+    st.caption(f"Plan cache: {plan_stats['hits']} hits • {plan_stats['misses']} misses • {plan_stats['entries']}/{plan_stats['max_entries']} entries")
+    st.caption(f"Plan history: {plan_store.path if plan_store is not None else 'unavailable'}")
+    font_sources = get_font_registry().sources()
+    if font_sources:
+        st.caption("Fonts: " + " • ".join(f"{k} → {v}" for k, v in font_sources.items()))
+
+# -----------------------
+# 🛠️ Debug Panel
+# -----------------------
+rerun_record = metrics.finish()
+if debug_panel:
+    with st.expander("🛠️ Debug: rerun metrics", expanded=False):
+        st.caption(f"Rerun {rerun_record['rerun_id']} • {rerun_record['total_ms']:.1f} ms wall • {rerun_record['cpu_ms']:.1f} ms CPU"
+                   + (f" • profiled → {rerun_record['profile']}" if rerun_record["profile"] else ""))
+        st.markdown("**This rerun (ms)**")
+        st.table({name: [round(ms, 2)] for name, ms in rerun_record["stages_ms"].items()})
+        st.markdown("**Cache activity during this rerun (process-wide, includes other sessions)**")
+        st.table({name: [n] for name, n in rerun_record["counters"].items()})
+        st.markdown("**Recent reruns in this process**")
+        st.table({name: {k: round(v, 2) for k, v in row.items()} for name, row in stage_summary().items()})